@@ -1,25 +1,34 @@
 import base64
+import calendar
 
+import io
 import json
+import logging
 import os
 import shutil
 import socket
 import sqlite3
 import tempfile
 import zipfile
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from abbonamenti.database.schema import AuditLogEntry, Schema, Subscription
 from abbonamenti.security.crypto import CryptoManager, derive_key_from_passphrase, encrypt_with_key, decrypt_with_key
 from abbonamenti.security.hmac import HMACManager
 
+logger = logging.getLogger(__name__)
+
 # Magic header to identify valid backup files
 _BACKUP_MAGIC_HEADER = b"87029"
 
 
 class DatabaseManager:
+    # Payment method codes yielded by iter_stats_rows
+    METHOD_POS = 0
+    METHOD_BOLLETTINO = 1
+
     def __init__(self, db_path: Path, keys_dir: Path):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -363,7 +372,7 @@ class DatabaseManager:
         )
 
     def _get_subscriptions_for_stats(
-        self, date_from: datetime | None = None, date_to: datetime | None = None
+        self, date_from: date | None = None, date_to: date | None = None
     ) -> list[dict]:
         """
         Lightweight query for statistics - only decrypts payment_details.
@@ -375,25 +384,14 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         # Build query with optional date filtering on subscription_start
+        where, params = self._stats_date_filter(date_from, date_to)
         query = """SELECT protocol_id, subscription_start, subscription_end,
                       payment_details_encrypted, payment_method, created_at
-               FROM subscriptions"""
-        params = []
-        
-        if date_from or date_to:
-            where_clauses = []
-            if date_from:
-                where_clauses.append("subscription_start >= ?")
-                params.append(date_from.isoformat())
-            if date_to:
-                where_clauses.append("subscription_start <= ?")
-                params.append(date_to.isoformat())
-            query += " WHERE " + " AND ".join(where_clauses)
+               FROM subscriptions""" + where
         
         query += " ORDER BY protocol_id"
         
-        print(f"DEBUG _get_subscriptions_for_stats query: {query}")
-        print(f"DEBUG _get_subscriptions_for_stats params: {params}")
+        logger.debug("_get_subscriptions_for_stats query: %s params: %s", query, params)
         
         cursor.execute(query, params)
         rows = cursor.fetchall()
@@ -414,6 +412,48 @@ class DatabaseManager:
 
         return subscriptions
 
+    @staticmethod
+    def _stats_date_filter(
+        date_from: date | None, date_to: date | None
+    ) -> tuple[str, list]:
+        """Build the optional WHERE clause on subscription_start for stats queries."""
+        where_clauses = []
+        params = []
+        if date_from:
+            where_clauses.append("subscription_start >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where_clauses.append("subscription_start <= ?")
+            params.append(date_to.isoformat())
+        if not where_clauses:
+            return "", params
+        return " WHERE " + " AND ".join(where_clauses), params
+
+    def iter_stats_rows(
+        self, date_from: date | None = None, date_to: date | None = None
+    ) -> Iterator[tuple[float, int]]:
+        """
+        Stream (amount, method_code) pairs for POS / BOLLETTINO payments.
+
+        The method is normalized with _normalize_payment_method, so the
+        revenues agree with the counts from get_payment_statistics; rows with
+        other methods are never decrypted. Rows are read from the cursor one
+        at a time.
+        """
+        codes = {"POS": self.METHOD_POS, "BOLLETTINO": self.METHOD_BOLLETTINO}
+        where, params = self._stats_date_filter(date_from, date_to)
+        query = """SELECT payment_method, payment_details_encrypted
+               FROM subscriptions""" + where
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for method, payment_details_encrypted in conn.execute(query, params):
+                code = codes.get(self._normalize_payment_method(method))
+                if code is not None:
+                    yield float(self.crypto.decrypt(payment_details_encrypted)), code
+        finally:
+            conn.close()
+
     @staticmethod
     def _normalize_payment_method(method: str) -> str:
         """Normalize payment method variants to canonical labels."""
@@ -645,6 +685,81 @@ class DatabaseManager:
         conn.close()
         return len(issues) == 0, issues
 
+    def get_all_statistics(
+        self, year: int | None = None, month: int | None = None
+    ) -> dict:
+        """
+        Compute every statistics-dashboard aggregate from a single query.
+
+        Returns the same values as get_payment_statistics, get_monthly_revenue,
+        get_payment_methods_breakdown, get_revenue_trend and
+        get_subscriptions_per_month, keyed as the statistics viewer expects.
+        When a year is given only that year's rows are fetched and decrypted.
+        """
+        date_from = date_to = None
+        if year:
+            first_month, last_month = (month, month) if month else (1, 12)
+            # A plain date: subscription_start may be stored as 'YYYY-MM-DD',
+            # which sorts before 'YYYY-MM-DDT00:00:00'. The SQL range only
+            # narrows the scan; the year/month check below decides.
+            date_from = date(year, first_month, 1)
+            date_to = datetime(
+                year, last_month, calendar.monthrange(year, last_month)[1],
+                23, 59, 59, 999999,
+            )
+        subs = [
+            sub for sub in self._get_subscriptions_for_stats(date_from, date_to)
+            if (not year or sub["subscription_start"].year == year)
+            and (not month or sub["subscription_start"].month == month)
+        ]
+
+        total_revenue = 0.0
+        methods = {"POS": 0, "BOLLETTINO": 0}
+        monthly_revenue: dict[str, float] = {}
+        monthly_count: dict[str, int] = {}
+        for sub in subs:
+            amount = sub["payment_details"]
+            total_revenue += amount
+
+            method_normalized = self._normalize_payment_method(
+                sub.get("payment_method", "")
+            )
+            if method_normalized in methods:
+                methods[method_normalized] += 1
+
+            month_label = sub["subscription_start"].strftime("%b %Y")
+            monthly_revenue[month_label] = (
+                monthly_revenue.get(month_label, 0.0) + amount
+            )
+            monthly_count[month_label] = monthly_count.get(month_label, 0) + 1
+
+        # Cumulative trend; show the year in labels when spanning multiple years
+        date_format = "%d/%m/%Y" if year is None else "%d/%m"
+        cumulative = 0.0
+        trend: list[tuple[str, float]] = []
+        for sub in sorted(subs, key=lambda x: x["subscription_start"]):
+            cumulative += sub["payment_details"]
+            trend.append((sub["subscription_start"].strftime(date_format), cumulative))
+
+        subscription_count = len(subs)
+        return {
+            "payment_stats": {
+                "total_revenue": total_revenue,
+                "subscription_count": subscription_count,
+                "average_payment": (
+                    total_revenue / subscription_count
+                    if subscription_count > 0
+                    else 0.0
+                ),
+                "pos_count": methods["POS"],
+                "bollettino_count": methods["BOLLETTINO"],
+            },
+            "monthly_revenue": sorted(monthly_revenue.items(), key=lambda x: x[0]),
+            "methods_breakdown": methods,
+            "trend": trend,
+            "subscriptions": sorted(monthly_count.items(), key=lambda x: x[0]),
+        }
+
     def get_payment_statistics(
         self,
         year: int | None = None,
@@ -1129,6 +1244,7 @@ class DatabaseManager:
         backup_path: Path,
         passphrase: str,
         progress_callback: Optional[callable] = None,
+        key: Optional[bytes] = None,
     ) -> tuple[bool, str]:
         """
         Restore database and keys from an encrypted backup.
@@ -1146,6 +1262,7 @@ class DatabaseManager:
             backup_path: Path to .enc backup file
             passphrase: User passphrase used during backup
             progress_callback: Optional callback(step, total_steps, message)
+            key: Optional key already derived from passphrase and the backup's salt
             
         Returns:
             Tuple of (success, message_or_error)
@@ -1179,7 +1296,8 @@ class DatabaseManager:
             if progress_callback:
                 progress_callback(2, 5, "Derivazione chiave di cifratura...")
             
-            key, _ = derive_key_from_passphrase(passphrase, salt)
+            if key is None:
+                key, _ = derive_key_from_passphrase(passphrase, salt)
             
             # Step 3: Decrypt
             if progress_callback:
@@ -1189,19 +1307,18 @@ class DatabaseManager:
                 archive_data = decrypt_with_key(encrypted_data, key)
             except Exception:
                 return False, "Passphrase non corretta o backup danneggiato"
+            # The ciphertext is no longer needed; don't hold both copies
+            del encrypted_data
             
-            # Step 4: Extract to temp
+            # Step 4: Extract to temp (straight from memory, no temporary .zip)
             if progress_callback:
                 progress_callback(4, 5, "Estrazione database e chiavi...")
             
             temp_dir = Path(tempfile.mkdtemp())
-            temp_zip = temp_dir / "backup.zip"
-            
-            with open(temp_zip, 'wb') as f:
-                f.write(archive_data)
             
-            with zipfile.ZipFile(temp_zip, 'r') as zipf:
+            with zipfile.ZipFile(io.BytesIO(archive_data), 'r') as zipf:
                 zipf.extractall(temp_dir)
+            del archive_data
             
             # Step 5: Replace current files atomically
             if progress_callback:
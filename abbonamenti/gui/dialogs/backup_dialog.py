@@ -20,6 +20,7 @@ from PyQt6.QtWidgets import (
 
 from abbonamenti.database.manager import DatabaseManager
 from abbonamenti.gui.styles import get_stylesheet
+from abbonamenti.security.crypto import MIN_PASSPHRASE_LEN
 from abbonamenti.utils.paths import get_backups_dir
 
 
@@ -98,7 +99,7 @@ class BackupDialog(QDialog):
         
         self.passphrase_input = QLineEdit()
         self.passphrase_input.setEchoMode(QLineEdit.EchoMode.Password)
-        self.passphrase_input.setPlaceholderText("Minimo 16 caratteri")
+        self.passphrase_input.setPlaceholderText(f"Minimo {MIN_PASSPHRASE_LEN} caratteri")
         self.passphrase_input.textChanged.connect(self.validate_passphrase)
         pass_layout.addRow("Passphrase *:", self.passphrase_input)
         
@@ -172,8 +173,10 @@ class BackupDialog(QDialog):
         confirm = self.confirm_input.text()
         
         # Check length
-        if len(passphrase) < 16:
-            self.strength_label.setText(f"Troppo corta ({len(passphrase)}/16 caratteri)")
+        if len(passphrase) < MIN_PASSPHRASE_LEN:
+            self.strength_label.setText(
+                f"Troppo corta ({len(passphrase)}/{MIN_PASSPHRASE_LEN} caratteri)"
+            )
             self.strength_label.setStyleSheet("color: #f44336; font-size: 11px;")
             self.backup_btn.setEnabled(False)
             return
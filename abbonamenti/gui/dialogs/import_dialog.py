@@ -1,10 +1,11 @@
 """Import dialog for bulk subscription imports from Excel files."""
 
 import json
+import sys
 from datetime import datetime
 from pathlib import Path
 
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import QStringListModel, pyqtSignal
 from PyQt6.QtWidgets import (
     QComboBox,
     QDialog,
@@ -24,6 +25,29 @@ from PyQt6.QtWidgets import (
 from abbonamenti.utils.excel_parser import read_excel_file, validate_all_rows
 from abbonamenti.utils.paths import get_app_data_dir
 
+# Required fields: (field id, form label)
+_REQUIRED_FIELDS = (
+    ("owner_name", "Nome Proprietario *"),
+    ("license_plate", "Targa *"),
+    ("subscription_start", "Data Inizio *"),
+    ("payment_details", "Importo *"),
+)
+
+# Optional fields: (field id, form label)
+_OPTIONAL_FIELDS = (
+    ("email", "Email"),
+    ("address", "Indirizzo"),
+    ("mobile", "Cellulare"),
+    ("subscription_end", "Data Fine"),
+    ("pos", "POS"),
+    ("bollettino", "Bollettino"),
+)
+
+_REQUIRED_FIELD_IDS = frozenset(field_id for field_id, _ in _REQUIRED_FIELDS)
+
+# Placeholder entry at index 0 of every column combo
+_UNMAPPED_LABEL = "-- Non mappato --"
+
 
 class ImportDialog(QDialog):
     """Dialog for importing subscriptions from Excel files."""
@@ -68,28 +92,12 @@ class ImportDialog(QDialog):
         mapping_layout = QFormLayout()
 
         self.column_combos = {}
+        # One model shared by all column combos (index 0 means "unmapped")
+        self._combo_model = QStringListModel([_UNMAPPED_LABEL], self)
 
-        # Required fields
-        required_fields = [
-            ("owner_name", "Nome Proprietario *"),
-            ("license_plate", "Targa *"),
-            ("subscription_start", "Data Inizio *"),
-            ("payment_details", "Importo *"),
-        ]
-
-        # Optional fields
-        optional_fields = [
-            ("email", "Email"),
-            ("address", "Indirizzo"),
-            ("mobile", "Cellulare"),
-            ("subscription_end", "Data Fine"),
-            ("pos", "POS"),
-            ("bollettino", "Bollettino"),
-        ]
-
-        for field_id, field_label in required_fields + optional_fields:
+        for field_id, field_label in _REQUIRED_FIELDS + _OPTIONAL_FIELDS:
             combo = QComboBox()
-            combo.addItem("-- Non mappato --", "")
+            combo.setModel(self._combo_model)
             combo.setMinimumWidth(200)
             self.column_combos[field_id] = combo
             mapping_layout.addRow(field_label + ":", combo)
@@ -181,20 +189,18 @@ class ImportDialog(QDialog):
             workbook = openpyxl.load_workbook(self.excel_file_path, data_only=True)
             sheet = workbook.active
 
-            # Get header row
-            headers = []
-            for cell in sheet[1]:
-                if cell.value:
-                    headers.append(str(cell.value).strip())
+            # Get header row (interned: the same strings are shared by all combos)
+            header_row = next(
+                sheet.iter_rows(min_row=1, max_row=1, values_only=True), ()
+            )
+            headers = [sys.intern(str(value).strip()) for value in header_row if value]
 
             workbook.close()
 
-            # Populate combo boxes
+            # Populate combo boxes (all of them share the same model)
+            self._combo_model.setStringList([_UNMAPPED_LABEL, *headers])
             for combo in self.column_combos.values():
-                combo.clear()
-                combo.addItem("-- Non mappato --", "")
-                for header in headers:
-                    combo.addItem(header, header)
+                combo.setCurrentIndex(0)
 
             # Try to auto-match saved mappings
             self.apply_saved_mappings()
@@ -221,20 +227,13 @@ class ImportDialog(QDialog):
         # Get column mapping
         column_mapping = {}
         for field_id, combo in self.column_combos.items():
-            excel_col = combo.currentData()
-            if excel_col:
-                column_mapping[field_id] = excel_col
-
-        # Check required fields
-        required_fields = [
-            "owner_name",
-            "license_plate",
-            "subscription_start",
-            "payment_details",
-        ]
-
-        missing_fields = [f for f in required_fields if f not in column_mapping]
-        if missing_fields:
+            if combo.currentIndex() > 0:
+                column_mapping[field_id] = combo.currentText()
+
+        # Check required fields (reported in form order)
+        missing = _REQUIRED_FIELD_IDS - column_mapping.keys()
+        if missing:
+            missing_fields = [f for f, _ in _REQUIRED_FIELDS if f in missing]
             QMessageBox.warning(
                 self,
                 "Errore",
@@ -436,6 +435,18 @@ class ImportDialog(QDialog):
             self.import_button.setEnabled(False)
             self.browse_button.setEnabled(True)
 
+    def done(self, result: int):
+        """Release row buffers and schedule deletion when the dialog closes.
+
+        ``accept()``, ``reject()`` and the window close button all end up
+        here, so large validated buffers are freed as soon as the dialog is
+        dismissed instead of when the parent window is destroyed.
+        """
+        self.excel_data = []
+        self.validated_data = []
+        super().done(result)
+        self.deleteLater()
+
     def get_mappings_file_path(self) -> Path:
         """Get path to column mappings config file."""
         config_dir = get_app_data_dir()
@@ -472,8 +483,7 @@ class ImportDialog(QDialog):
         for field_id, excel_col in self.saved_mappings.items():
             if field_id in self.column_combos:
                 combo = self.column_combos[field_id]
-                # Find and select the matching column
-                for i in range(combo.count()):
-                    if combo.itemData(i) == excel_col:
-                        combo.setCurrentIndex(i)
-                        break
+                # Find and select the matching column (skip the placeholder)
+                index = combo.findText(excel_col)
+                if index > 0:
+                    combo.setCurrentIndex(index)
@@ -1,11 +1,16 @@
 """
 Master Key Export dialog for backing up encryption keys
 """
+from datetime import datetime
 from pathlib import Path
+import hmac
+import io
+import re
+import time
 import zipfile
 import os
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -13,6 +18,7 @@ from PyQt6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
+    QProgressDialog,
     QFileDialog,
     QMessageBox,
     QGroupBox,
@@ -21,15 +27,98 @@ from PyQt6.QtWidgets import (
 )
 
 from abbonamenti.gui.styles import get_stylesheet
-from abbonamenti.security.crypto import derive_key_from_passphrase, encrypt_with_key
+from abbonamenti.utils.paths import get_backups_dir
+from abbonamenti.security.crypto import (
+    MAGIC,
+    VERSION_KEY_EXPORT_ARGON2,
+    derive_key_from_passphrase_argon2,
+    encrypt_with_key,
+)
+
+_SYMBOLS = frozenset("!@#$%^&*()-_=+[]{}|;:,.<>?")
+
+# Character classes used for the strength indicator
+_LOWER_RE = re.compile(r"[a-z]")
+_UPPER_RE = re.compile(r"[A-Z]")
+_DIGIT_RE = re.compile(r"\d")
+_SYMBOL_RE = re.compile(f"[{re.escape(''.join(sorted(_SYMBOLS)))}]")
+_STRENGTH_PATTERNS = (_LOWER_RE, _UPPER_RE, _DIGIT_RE, _SYMBOL_RE)
+# Strength is judged on this many leading characters at most
+_STRENGTH_SAMPLE_LEN = 100
+
+
+class KeyExportThread(QThread):
+    """Background thread for building and encrypting the key archive"""
+    finished = pyqtSignal(bool, str)  # success, error message
+
+    def __init__(self, keys_dir: Path, output_path: Path, password: str):
+        super().__init__()
+        self.keys_dir = keys_dir
+        self.output_path = output_path
+        self.password = password
+
+    def run(self):
+        """Export keys in background"""
+        try:
+            with os.scandir(self.keys_dir) as entries:
+                key_files = [
+                    entry
+                    for entry in entries
+                    if entry.is_file() and entry.name.endswith(('.bin', '.pem'))
+                ]
+
+            # Build the zip in memory (stored: key material does not compress)
+            buffer = io.BytesIO()
+
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zipf:
+                # Add all key files, reusing the stat data from the scan
+                for entry in key_files:
+                    stat = entry.stat()
+                    info = zipfile.ZipInfo(
+                        f"keys/{entry.name}", time.localtime(stat.st_mtime)[:6]
+                    )
+                    info.external_attr = (stat.st_mode & 0xFFFF) << 16
+                    zipf.writestr(info, Path(entry.path).read_bytes())
+
+            # Encrypt the zip (always encrypted now)
+            zip_data = buffer.getvalue()
+            buffer.close()
+
+            # Derive key and encrypt
+            key, salt = derive_key_from_passphrase_argon2(self.password)
+            encrypted_data = encrypt_with_key(zip_data, key)
+
+            # Write encrypted file with metadata in a single write
+            self.output_path.write_bytes(
+                b"".join(
+                    (
+                        MAGIC,
+                        bytes((VERSION_KEY_EXPORT_ARGON2,)),
+                        salt,
+                        encrypted_data,
+                    )
+                )
+            )
+
+            self.finished.emit(True, "")
+        except Exception as e:
+            self.finished.emit(False, str(e))
 
 
 class KeyExportDialog(QDialog):
     """Dialog for exporting master encryption keys"""
     
+    # Strength label stylesheets, applied only when the level changes
+    _SS_EMPTY = "color: #999; font-size: 11px;"
+    _SS_ERR = "color: #d32f2f; font-size: 11px;"
+    _SS_WEAK = "color: #ff9800; font-size: 11px;"
+    _SS_MED = "color: #2196F3; font-size: 11px;"
+    _SS_STRONG = "color: #4CAF50; font-size: 11px;"
+
     def __init__(self, keys_dir: Path, parent=None):
         super().__init__(parent)
         self.keys_dir = keys_dir
+        self.export_thread = None
         self.init_ui()
     
     def init_ui(self):
@@ -38,6 +127,12 @@ class KeyExportDialog(QDialog):
         self.setMinimumHeight(450)
         self.setStyleSheet(get_stylesheet())
         
+        # Coalesce keystrokes: validate only once the user pauses typing
+        self._validate_timer = QTimer(self)
+        self._validate_timer.setSingleShot(True)
+        self._validate_timer.setInterval(150)
+        self._validate_timer.timeout.connect(self._do_validate)
+
         layout = QVBoxLayout(self)
         layout.setSpacing(16)
         
@@ -87,7 +182,8 @@ class KeyExportDialog(QDialog):
         protection_layout.addRow("Conferma *:", self.confirm_input)
         
         self.strength_label = QLabel("")
-        self.strength_label.setStyleSheet("color: #999; font-size: 11px;")
+        self.strength_label.setStyleSheet(self._SS_EMPTY)
+        self._strength_style = self._SS_EMPTY
         protection_layout.addRow("", self.strength_label)
         
         warning_label2 = QLabel(
@@ -140,7 +236,17 @@ class KeyExportDialog(QDialog):
         
         layout.addLayout(button_layout)
     
+    def _set_strength_style(self, style: str):
+        """Apply a strength stylesheet, skipping Qt re-polish if unchanged"""
+        if style is not self._strength_style:
+            self.strength_label.setStyleSheet(style)
+            self._strength_style = style
+
     def validate_passphrase(self):
+        """Schedule passphrase validation (debounced)"""
+        self._validate_timer.start()
+
+    def _do_validate(self):
         """Validate passphrase and enable export button"""
         password = self.password_input.text()
         confirm = self.confirm_input.text()
@@ -152,33 +258,29 @@ class KeyExportDialog(QDialog):
         
         if len(password) < 16:
             self.strength_label.setText("✗ Troppo corta (minimo 16 caratteri)")
-            self.strength_label.setStyleSheet("color: #d32f2f; font-size: 11px;")
+            self._set_strength_style(self._SS_ERR)
             self.export_btn.setEnabled(False)
             return
         
-        if password != confirm:
+        if not hmac.compare_digest(password.encode(), confirm.encode()):
             self.strength_label.setText("✗ Le password non coincidono")
-            self.strength_label.setStyleSheet("color: #d32f2f; font-size: 11px;")
+            self._set_strength_style(self._SS_ERR)
             self.export_btn.setEnabled(False)
             return
         
-        # Calculate strength
-        has_lower = any(c.islower() for c in password)
-        has_upper = any(c.isupper() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_symbol = any(c in "!@#$%^&*()-_=+[]{}|;:,.<>?" for c in password)
-        
-        strength = sum([has_lower, has_upper, has_digit, has_symbol])
+        # Calculate strength (each search stops at the first match)
+        sample = password[:_STRENGTH_SAMPLE_LEN]
+        strength = sum(1 for pattern in _STRENGTH_PATTERNS if pattern.search(sample))
         
         if strength <= 1:
             self.strength_label.setText("✓ Valida (Debole - aggiungi numeri/simboli)")
-            self.strength_label.setStyleSheet("color: #ff9800; font-size: 11px;")
+            self._set_strength_style(self._SS_WEAK)
         elif strength <= 2:
             self.strength_label.setText("✓ Valida (Media)")
-            self.strength_label.setStyleSheet("color: #2196F3; font-size: 11px;")
+            self._set_strength_style(self._SS_MED)
         else:
             self.strength_label.setText("✓ Valida (Forte)")
-            self.strength_label.setStyleSheet("color: #4CAF50; font-size: 11px;")
+            self._set_strength_style(self._SS_STRONG)
         
         self.export_btn.setEnabled(True)
     
@@ -196,7 +298,7 @@ class KeyExportDialog(QDialog):
             )
             return
         
-        if password != confirm:
+        if not hmac.compare_digest(password.encode(), confirm.encode()):
             QMessageBox.warning(
                 self,
                 "Password Non Coincidono",
@@ -215,62 +317,78 @@ class KeyExportDialog(QDialog):
         if not file_path:
             return
         
-        try:
-            # Create temporary zip
-            import tempfile
-            temp_zip = Path(tempfile.gettempdir()) / "temp_keys.zip"
-            
-            with zipfile.ZipFile(temp_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add all key files
-                for key_file in self.keys_dir.iterdir():
-                    if key_file.is_file() and key_file.suffix in ['.bin', '.pem']:
-                        zipf.write(key_file, f"keys/{key_file.name}")
-            
-            # Encrypt the zip (always encrypted now)
-            with open(temp_zip, 'rb') as f:
-                zip_data = f.read()
-            
-            # Derive key and encrypt
-            key, salt = derive_key_from_passphrase(password)
-            encrypted_data = encrypt_with_key(zip_data, key)
-            
-            # Write encrypted file with metadata
-            with open(file_path, 'wb') as f:
-                f.write(b'87029')  # Magic header
-                f.write(b'\x02')  # Version 2 (key export)
-                f.write(salt)
-                f.write(encrypted_data)
-            
-            # Cleanup
-            temp_zip.unlink()
-            
-            # Store for recovery sheet
-            self.last_export_path = file_path
-            self.last_password = password
-            
-            # Show success message
-            QMessageBox.information(
-                self,
-                "Esportazione Completata",
-                f"Chiavi esportate con successo:\n\n{file_path}"
-            )
-            
-            # Generate recovery sheet automatically
-            self.generate_recovery_sheet()
-            
-        except Exception as e:
+        # Store for recovery sheet
+        self.last_export_path = file_path
+        self.last_export_dir = os.path.normpath(os.path.dirname(file_path))
+        self.last_password = password
+
+        # Key derivation is slow by design: run it off the GUI thread
+        self.export_btn.setEnabled(False)
+        self.progress_dialog = QProgressDialog(
+            "Cifratura delle chiavi in corso...", "", 0, 0, self
+        )
+        self.progress_dialog.setWindowTitle("Esportazione Chiavi")
+        self.progress_dialog.setCancelButton(None)
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.show()
+
+        self.export_thread = KeyExportThread(self.keys_dir, Path(file_path), password)
+        self.export_thread.finished.connect(self.on_export_finished)
+        self.export_thread.start()
+
+    def on_export_finished(self, success: bool, message: str):
+        """Handle export thread completion"""
+        # run() has already emitted its result, so the wait is only for it
+        # to return
+        thread = self.export_thread
+        self.export_thread = None
+        if thread is not None:
+            thread.wait()
+            # Don't keep the password alive until the deferred delete runs
+            thread.password = None
+            thread.deleteLater()
+
+        self.progress_dialog.close()
+        self.export_btn.setEnabled(True)
+
+        if not success:
             QMessageBox.critical(
                 self,
                 "Errore Esportazione",
-                f"Impossibile esportare le chiavi:\n\n{str(e)}"
+                f"Impossibile esportare le chiavi:\n\n{message}"
             )
+            return
+
+        # Show success message
+        QMessageBox.information(
+            self,
+            "Esportazione Completata",
+            f"Chiavi esportate con successo:\n\n{self.last_export_path}"
+        )
+
+        # Generate recovery sheet automatically
+        self.generate_recovery_sheet()
     
+    def _is_exporting(self) -> bool:
+        return self.export_thread is not None and self.export_thread.isRunning()
+
+    def reject(self):
+        """Ignore Esc / close requests while an export is in progress"""
+        if self._is_exporting():
+            return
+        super().reject()
+
+    def closeEvent(self, event):
+        """Keep the dialog open until a running export has finished"""
+        if self._is_exporting():
+            event.ignore()
+            return
+        super().closeEvent(event)
+
     def generate_recovery_sheet(self):
         """Generate and automatically open emergency recovery sheet PDF"""
+        # reportlab is heavy: load it only when a sheet is actually generated
         from abbonamenti.utils.recovery_sheet import generate_recovery_sheet_pdf
-        from abbonamenti.utils.paths import get_backups_dir
-        from datetime import datetime
-        import os
         
         try:
             # Prepare recovery sheet path
@@ -308,7 +426,7 @@ class KeyExportDialog(QDialog):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    os.startfile(str(Path(self.last_export_path).parent))
+                    os.startfile(self.last_export_dir)
                 
                 self.accept()
             else:
@@ -1,12 +1,13 @@
 """Dialog for restoring master encryption keys from backup (.enc or .zip)."""
 from __future__ import annotations
 
+import hmac
+import io
 import os
-import shutil
-import tempfile
 import zipfile
 from pathlib import Path
 
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtWidgets import (
     QDialog,
     QFileDialog,
@@ -16,15 +17,107 @@ from PyQt6.QtWidgets import (
     QLabel,
     QLineEdit,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QVBoxLayout,
 )
 
 from abbonamenti.gui.styles import get_stylesheet
 from abbonamenti.security.crypto import (
+    MAGIC,
+    SALT_LEN,
+    VERSION_DB_BACKUP,
+    VERSION_KEY_EXPORT,
+    VERSION_KEY_EXPORT_ARGON2,
     decrypt_with_key,
     derive_key_from_passphrase,
+    derive_key_from_passphrase_argon2,
 )
+from abbonamenti.utils.paths import get_keys_dir
+
+
+class KeyImportThread(QThread):
+    """Background thread for decrypting and extracting a key backup."""
+
+    finished = pyqtSignal(bool, str)  # success, error message
+
+    def __init__(self, source: Path, password: str):
+        super().__init__()
+        self.source = source
+        self.password = password
+
+    def run(self):
+        try:
+            zip_bytes: bytes
+            if self.source.suffix.lower() == ".enc":
+                with self.source.open("rb") as f:
+                    # Check magic header before reading the payload
+                    magic = f.read(len(MAGIC))
+                    if not magic:
+                        raise ValueError("File vuoto")
+                    if len(magic) < len(MAGIC):
+                        raise ValueError("File non valido (troppo corto)")
+
+                    if not hmac.compare_digest(magic, MAGIC):
+                        raise ValueError(
+                            "File non valido: non è un backup di AbbonaMunicipale"
+                        )
+
+                    # Detect format after magic header
+                    version = f.read(1)
+                    if not version:
+                        raise ValueError("File non valido (troppo corto)")
+                    header = version[0]
+                    if header in (VERSION_KEY_EXPORT, VERSION_KEY_EXPORT_ARGON2):
+                        # Key export (encrypted, version 3 = Argon2id, 2 = PBKDF2)
+                        salt = f.read(SALT_LEN)
+                        payload = f.read()
+
+                        if len(self.password) < 16:
+                            raise ValueError("Password minima: 16 caratteri")
+
+                        if header == VERSION_KEY_EXPORT_ARGON2:
+                            key, _ = derive_key_from_passphrase_argon2(
+                                self.password, salt
+                            )
+                        else:
+                            key, _ = derive_key_from_passphrase(self.password, salt)
+                        zip_bytes = decrypt_with_key(payload, key)
+                    elif header == VERSION_DB_BACKUP:
+                        # Database backup (version 1) - cannot import as keys
+                        raise ValueError(
+                            "Hai selezionato un backup del database (.enc v1).\n"
+                            "Per ripristinare il database usa 'Ripristina Backup'.\n"
+                            "Per le chiavi usa il file esportato da "
+                            "'Esporta Chiave di Recupero'."
+                        )
+                    else:
+                        raise ValueError(
+                            f"Formato backup non riconosciuto (versione {header})."
+                        )
+            else:
+                zip_bytes = self.source.read_bytes()
+
+            with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+                members = [
+                    info
+                    for info in zf.infolist()
+                    if info.filename.startswith("keys/") and not info.is_dir()
+                ]
+                if not members:
+                    raise ValueError("Archivio non contiene la cartella 'keys/'")
+
+                target_dir = Path(get_keys_dir())
+                target_dir.mkdir(parents=True, exist_ok=True)
+
+                # Extract flat into the keys directory
+                for info in members:
+                    info.filename = info.filename.rsplit("/", 1)[-1]
+                zf.extractall(target_dir, members=members)
+
+            self.finished.emit(True, "")
+        except Exception as exc:  # noqa: BLE001
+            self.finished.emit(False, str(exc))
 
 
 class KeyImportDialog(QDialog):
@@ -37,6 +130,7 @@ class KeyImportDialog(QDialog):
         self.setWindowTitle("Ripristina Chiavi di Recupero")
         self.setMinimumWidth(520)
         self.setStyleSheet(get_stylesheet())
+        self.import_thread = None
         self._build_ui()
 
     def _build_ui(self):
@@ -91,15 +185,15 @@ class KeyImportDialog(QDialog):
         buttons.addStretch()
         cancel_btn = QPushButton("Annulla")
         cancel_btn.clicked.connect(self.reject)
-        import_btn = QPushButton("Ripristina Chiavi")
-        import_btn.clicked.connect(self._import_keys)
-        import_btn.setStyleSheet(
+        self.import_btn = QPushButton("Ripristina Chiavi")
+        self.import_btn.clicked.connect(self._import_keys)
+        self.import_btn.setStyleSheet(
             "QPushButton { background: #2e7d32; color: white; font-weight: bold; "
             "padding: 9px 18px; } "
             "QPushButton:hover { background: #1b5e20; }"
         )
         buttons.addWidget(cancel_btn)
-        buttons.addWidget(import_btn)
+        buttons.addWidget(self.import_btn)
         layout.addLayout(buttons)
 
     def _browse(self):
@@ -120,8 +214,6 @@ class KeyImportDialog(QDialog):
             self.pass_input.clear()
 
     def _import_keys(self):
-        from abbonamenti.utils.paths import get_keys_dir
-
         path_str = self.file_input.text().strip()
         if not path_str:
             QMessageBox.warning(self, "Seleziona File", "Seleziona il file di chiavi.")
@@ -140,89 +232,72 @@ class KeyImportDialog(QDialog):
             )
             return
 
-        try:
-            zip_bytes: bytes
-            if source.suffix.lower() == ".enc":
-                data = source.read_bytes()
-                if not data:
-                    raise ValueError("File vuoto")
-
-                # Check magic header
-                if len(data) < 5:
-                    raise ValueError("File non valido (troppo corto)")
-                
-                magic = data[0:5]
-                if magic != b"87029":
-                    raise ValueError("File non valido: non è un backup di AbbonaMunicipale")
-                
-                # Detect format after magic header
-                header = data[5]
-                if header == 0x02:
-                    # Key export (encrypted, version 2)
-                    salt = data[6:38]
-                    payload = data[38:]
-
-                    password = self.pass_input.text()
-                    if len(password) < 16:
-                        raise ValueError("Password minima: 16 caratteri")
-
-                    key, _ = derive_key_from_passphrase(password, salt)
-                    zip_bytes = decrypt_with_key(payload, key)
-                elif header == 0x01:
-                    # Database backup (version 1) - cannot import as keys
-                    raise ValueError(
-                        "Hai selezionato un backup del database (.enc v1).\n"
-                        "Per ripristinare il database usa 'Ripristina Backup'.\n"
-                        "Per le chiavi usa il file esportato da 'Esporta Chiave di Recupero'."
-                    )
-                else:
-                    raise ValueError(
-                        f"Formato backup non riconosciuto (versione {header})."
-                    )
-            else:
-                zip_bytes = source.read_bytes()
-
-            with tempfile.TemporaryDirectory() as tmpdir:
-                zip_path = Path(tmpdir) / "keys.zip"
-                zip_path.write_bytes(zip_bytes)
-                with zipfile.ZipFile(zip_path, "r") as zf:
-                    members = [m for m in zf.namelist() if m.startswith("keys/")]
-                    if not members:
-                        raise ValueError("Archivio non contiene la cartella 'keys/'")
-
-                    target_dir = Path(get_keys_dir())
-                    target_dir.mkdir(parents=True, exist_ok=True)
-
-                    for member in members:
-                        if member.endswith("/"):
-                            continue
-                        name = Path(member).name
-                        dest = target_dir / name
-                        with zf.open(member) as src, open(dest, "wb") as dst:
-                            shutil.copyfileobj(src, dst)
-
-            QMessageBox.information(
+        # Key derivation is slow by design: run it off the GUI thread
+        self.import_btn.setEnabled(False)
+        self.progress_dialog = QProgressDialog(
+            "Decifratura delle chiavi in corso...", "", 0, 0, self
+        )
+        self.progress_dialog.setWindowTitle("Ripristino Chiavi")
+        self.progress_dialog.setCancelButton(None)
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.show()
+
+        self.import_thread = KeyImportThread(source, self.pass_input.text())
+        self.import_thread.finished.connect(self._on_import_finished)
+        self.import_thread.start()
+
+    def _on_import_finished(self, success: bool, message: str):
+        # run() has already emitted its result, so the wait is only for it
+        # to return
+        thread = self.import_thread
+        self.import_thread = None
+        if thread is not None:
+            thread.wait()
+            # Don't keep the password alive until the deferred delete runs
+            thread.password = None
+            thread.deleteLater()
+
+        self.progress_dialog.close()
+        self.import_btn.setEnabled(True)
+
+        if not success:
+            QMessageBox.critical(
                 self,
-                "Ripristino completato",
-                "Chiavi ripristinate correttamente. Ora puoi aprire i backup cifrati.",
+                "Errore ripristino",
+                f"Impossibile ripristinare le chiavi:\n\n{message}",
             )
+            return
 
-            reply = QMessageBox.question(
-                self,
-                "Aprire la cartella?",
-                "Vuoi aprire la cartella delle chiavi?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                QMessageBox.StandardButton.No,
-            )
-            if reply == QMessageBox.StandardButton.Yes:
-                os.startfile(str(self.keys_dir))
+        QMessageBox.information(
+            self,
+            "Ripristino completato",
+            "Chiavi ripristinate correttamente. Ora puoi aprire i backup cifrati.",
+        )
 
-            self.accept()
+        reply = QMessageBox.question(
+            self,
+            "Aprire la cartella?",
+            "Vuoi aprire la cartella delle chiavi?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No,
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            os.startfile(str(self.keys_dir))
 
-        except Exception as exc:  # noqa: BLE001
-            QMessageBox.critical(
-                self,
-                "Errore ripristino",
-                f"Impossibile ripristinare le chiavi:\n\n{exc}",
-            )
+        self.accept()
 
+    def _is_importing(self) -> bool:
+        return self.import_thread is not None and self.import_thread.isRunning()
+
+    def reject(self):
+        """Ignore Esc / close requests while an import is in progress"""
+        if self._is_importing():
+            return
+        super().reject()
+
+    def closeEvent(self, event):
+        """Keep the dialog open until a running import has finished"""
+        if self._is_importing():
+            event.ignore()
+            return
+        super().closeEvent(event)
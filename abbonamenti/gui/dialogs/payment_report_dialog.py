@@ -1,9 +1,12 @@
 """Payment Report Dialog for selecting period and generating PDF reports."""
-from datetime import datetime, timedelta
+import calendar
+import logging
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from string import Template
 from typing import Optional
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
     QButtonGroup,
@@ -18,12 +21,111 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QRadioButton,
     QSpinBox,
+    QStackedWidget,
     QVBoxLayout,
     QWidget,
 )
 
 from abbonamenti.database.manager import DatabaseManager
-from abbonamenti.gui.styles import get_color, get_stylesheet
+from abbonamenti.gui.styles import get_stylesheet, themed_stylesheet
+
+logger = logging.getLogger(__name__)
+
+
+def _iso_week1_monday_ordinal(year: int) -> int:
+    """Proleptic Gregorian ordinal of the Monday starting ISO week 1 of year."""
+    y = year - 1
+    # January 4th always falls in ISO week 1
+    jan4 = 365 * y + y // 4 - y // 100 + y // 400 + 4
+    # Ordinal 1 (0001-01-01) is a Monday, so (ordinal - 1) % 7 is the weekday
+    return jan4 - (jan4 - 1) % 7
+
+
+def _iso_week_monday(year: int, week: int) -> date:
+    """Return the Monday of an ISO week, like date.fromisocalendar(year, week, 1)."""
+    monday = _iso_week1_monday_ordinal(year) + (week - 1) * 7
+    if week < 1 or monday >= _iso_week1_monday_ordinal(year + 1):
+        raise ValueError(f"Invalid week: {week}")
+    return date.fromordinal(monday)
+
+
+# Maximum number of date ranges whose statistics are kept per dialog
+_STATS_CACHE_SIZE = 64
+
+# Stylesheet templates, substituted once per theme by themed_stylesheet()
+_PRIMARY_TEXT_QSS = Template("color: $primary;")
+_CARD_QSS = Template(
+    """
+    QWidget {
+        background-color: $card_bg;
+        border: 1px solid $border;
+        border-radius: 8px;
+    }
+    QWidget:hover {
+        border-color: $primary;
+    }
+    """
+)
+_PERIOD_GROUP_QSS = Template(
+    """
+    QGroupBox {
+        font-weight: bold;
+        border: 2px solid $border;
+        border-radius: 8px;
+        margin-top: 12px;
+        padding-top: 12px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        subcontrol-position: top left;
+        left: 10px;
+        padding: 0 5px;
+    }
+    """
+)
+_GENERATE_BTN_QSS = Template(
+    """
+    QPushButton {
+        background-color: $primary;
+        color: white;
+        font-weight: bold;
+        border-radius: 4px;
+    }
+    QPushButton:hover {
+        background-color: #1565c0;
+    }
+    """
+)
+
+
+class PreviewStatsThread(QThread):
+    """Background thread for loading the preview statistics"""
+
+    result = pyqtSignal(int, dict)  # request_id, stats
+    error = pyqtSignal(int, str)  # request_id, message
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        request_id: int,
+        date_from: datetime,
+        date_to: datetime,
+    ):
+        super().__init__()
+        self.db_manager = db_manager
+        self.request_id = request_id
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def run(self):
+        """Load statistics in background"""
+        try:
+            stats = self.db_manager.get_payment_statistics(
+                date_from=self.date_from, date_to=self.date_to
+            )
+            self.result.emit(self.request_id, stats)
+        except Exception as e:
+            self.error.emit(self.request_id, str(e))
 
 
 class StatCard(QWidget):
@@ -46,22 +148,11 @@ class StatCard(QWidget):
         value_font.setPointSize(20)
         value_font.setBold(True)
         self.value_label.setFont(value_font)
-        self.value_label.setStyleSheet(f"color: {get_color('primary')};")
+        self.value_label.setStyleSheet(themed_stylesheet(_PRIMARY_TEXT_QSS))
         layout.addWidget(self.value_label)
 
         # Style the card
-        self.setStyleSheet(
-            f"""
-            QWidget {{
-                background-color: {get_color('card_bg')};
-                border: 1px solid {get_color('border')};
-                border-radius: 8px;
-            }}
-            QWidget:hover {{
-                border-color: {get_color('primary')};
-            }}
-            """
-        )
+        self.setStyleSheet(themed_stylesheet(_CARD_QSS))
 
     def update_value(self, value: str):
         """Update the displayed value"""
@@ -71,21 +162,62 @@ class StatCard(QWidget):
 class PaymentReportDialog(QDialog):
     """Dialog for configuring and generating payment PDF reports"""
 
+    # Period button ids, as registered on period_group
+    _DAY, _WEEK, _MONTH, _YEAR = range(4)
+
+    # Per-period methods, looked up by the current mode
+    _PAGE_BUILDERS = {
+        _DAY: "_ensure_day_widgets",
+        _WEEK: "_ensure_week_widgets",
+        _MONTH: "_ensure_month_widgets",
+        _YEAR: "_ensure_year_widgets",
+    }
+    _RANGE_BUILDERS = {
+        _DAY: "_range_day",
+        _WEEK: "_range_week",
+        _MONTH: "_range_month",
+        _YEAR: "_range_year",
+    }
+    _FILENAME_BUILDERS = {
+        _DAY: "_filename_day",
+        _WEEK: "_filename_week",
+        _MONTH: "_filename_month",
+        _YEAR: "_filename_year",
+    }
+
     def __init__(self, db_manager: DatabaseManager, parent=None):
         super().__init__(parent)
         self.db_manager = db_manager
         self.selected_file_path: Optional[Path] = None
+        # Id of the checked period button, kept in sync by _on_period_toggled
+        self._mode = self._MONTH
+        self._preview_request_id = 0
+        self._preview_threads: set[PreviewStatsThread] = set()
+        # Statistics by (date_from, date_to); filled fresh each time the dialog opens
+        self._stats_cache: dict[tuple[datetime, datetime], dict] = {}
+        # Range currently shown (or being loaded) in the preview cards
+        self._last_range: Optional[tuple[datetime, datetime]] = None
+
+        # Coalesce bursts of picker signals into a single preview refresh
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(200)
+        self._preview_timer.timeout.connect(self._do_update_preview)
+
         self.init_ui()
-        # Set default to current month and load preview
+        # Set default to current month (idToggled updates widgets and preview)
         self.month_radio.setChecked(True)
-        self.update_date_widgets()
-        self.update_preview()
 
     def init_ui(self):
         self.setWindowTitle("📄 Genera Report PDF Pagamenti")
         self.setMinimumSize(700, 600)
         self.setStyleSheet(get_stylesheet())
 
+        # Read the clock once; the date pages created later default to it
+        now = datetime.now()
+        self._today = now.date()
+        self._iso_year, self._iso_week, _ = now.isocalendar()
+
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
         main_layout.setSpacing(16)
@@ -96,7 +228,7 @@ class PaymentReportDialog(QDialog):
         header_font.setPointSize(16)
         header_font.setBold(True)
         header_label.setFont(header_font)
-        header_label.setStyleSheet(f"color: {get_color('primary')};")
+        header_label.setStyleSheet(themed_stylesheet(_PRIMARY_TEXT_QSS))
         main_layout.addWidget(header_label)
 
         # Description
@@ -110,23 +242,7 @@ class PaymentReportDialog(QDialog):
 
         # Period selection group
         period_group = QGroupBox("Tipo di Periodo")
-        period_group.setStyleSheet(
-            f"""
-            QGroupBox {{
-                font-weight: bold;
-                border: 2px solid {get_color('border')};
-                border-radius: 8px;
-                margin-top: 12px;
-                padding-top: 12px;
-            }}
-            QGroupBox::title {{
-                subcontrol-origin: margin;
-                subcontrol-position: top left;
-                left: 10px;
-                padding: 0 5px;
-            }}
-            """
-        )
+        period_group.setStyleSheet(themed_stylesheet(_PERIOD_GROUP_QSS))
         period_layout = QVBoxLayout(period_group)
         period_layout.setSpacing(12)
 
@@ -137,16 +253,14 @@ class PaymentReportDialog(QDialog):
         self.year_radio = QRadioButton("Anno")
 
         self.period_group = QButtonGroup()
-        self.period_group.addButton(self.day_radio, 0)
-        self.period_group.addButton(self.week_radio, 1)
-        self.period_group.addButton(self.month_radio, 2)
-        self.period_group.addButton(self.year_radio, 3)
+        self.period_group.addButton(self.day_radio, self._DAY)
+        self.period_group.addButton(self.week_radio, self._WEEK)
+        self.period_group.addButton(self.month_radio, self._MONTH)
+        self.period_group.addButton(self.year_radio, self._YEAR)
 
-        # Connect radio buttons to update date widgets
-        self.day_radio.toggled.connect(self.update_date_widgets)
-        self.week_radio.toggled.connect(self.update_date_widgets)
-        self.month_radio.toggled.connect(self.update_date_widgets)
-        self.year_radio.toggled.connect(self.update_date_widgets)
+        # Update date widgets once per selection change (only the newly
+        # checked button, not the one being unchecked)
+        self.period_group.idToggled.connect(self._on_period_toggled)
 
         radio_layout = QHBoxLayout()
         radio_layout.addWidget(self.day_radio)
@@ -155,82 +269,11 @@ class PaymentReportDialog(QDialog):
         radio_layout.addWidget(self.year_radio)
         period_layout.addLayout(radio_layout)
 
-        # Date picker container
-        self.date_container = QWidget()
-        self.date_layout = QHBoxLayout(self.date_container)
-        self.date_layout.setContentsMargins(0, 0, 0, 0)
+        # Date picker pages, one per period type, created on first use
+        self.date_stack = QStackedWidget()
+        self._date_pages: dict[int, QWidget] = {}
 
-        # Day picker
-        self.day_label = QLabel("Data:")
-        self.day_picker = QDateEdit()
-        self.day_picker.setCalendarPopup(True)
-        self.day_picker.setDate(datetime.now().date())
-        self.day_picker.setDisplayFormat("dd/MM/yyyy")
-        self.day_picker.dateChanged.connect(self.update_preview)
-
-        # Week picker
-        self.week_label = QLabel("Settimana:")
-        self.week_spinner = QSpinBox()
-        self.week_spinner.setRange(1, 53)
-        self.week_spinner.setValue(datetime.now().isocalendar()[1])
-        self.week_spinner.valueChanged.connect(self.update_preview)
-
-        self.week_year_label = QLabel("Anno:")
-        self.week_year_spinner = QSpinBox()
-        self.week_year_spinner.setRange(2020, 2100)
-        self.week_year_spinner.setValue(datetime.now().year)
-        self.week_year_spinner.valueChanged.connect(self.update_preview)
-
-        # Month picker
-        self.month_label = QLabel("Mese:")
-        self.month_combo = QComboBox()
-        months = [
-            "Gennaio",
-            "Febbraio",
-            "Marzo",
-            "Aprile",
-            "Maggio",
-            "Giugno",
-            "Luglio",
-            "Agosto",
-            "Settembre",
-            "Ottobre",
-            "Novembre",
-            "Dicembre",
-        ]
-        self.month_combo.addItems(months)
-        self.month_combo.setCurrentIndex(datetime.now().month - 1)
-        self.month_combo.currentIndexChanged.connect(self.update_preview)
-
-        self.month_year_label = QLabel("Anno:")
-        self.month_year_spinner = QSpinBox()
-        self.month_year_spinner.setRange(2020, 2100)
-        self.month_year_spinner.setValue(datetime.now().year)
-        self.month_year_spinner.valueChanged.connect(self.update_preview)
-
-        # Year picker
-        self.year_label = QLabel("Anno:")
-        self.year_spinner = QSpinBox()
-        self.year_spinner.setRange(2020, 2100)
-        self.year_spinner.setValue(datetime.now().year)
-        self.year_spinner.valueChanged.connect(self.update_preview)
-
-        # Add all pickers to layout (will show/hide based on selection)
-        self.date_layout.addWidget(self.day_label)
-        self.date_layout.addWidget(self.day_picker)
-        self.date_layout.addWidget(self.week_label)
-        self.date_layout.addWidget(self.week_spinner)
-        self.date_layout.addWidget(self.week_year_label)
-        self.date_layout.addWidget(self.week_year_spinner)
-        self.date_layout.addWidget(self.month_label)
-        self.date_layout.addWidget(self.month_combo)
-        self.date_layout.addWidget(self.month_year_label)
-        self.date_layout.addWidget(self.month_year_spinner)
-        self.date_layout.addWidget(self.year_label)
-        self.date_layout.addWidget(self.year_spinner)
-        self.date_layout.addStretch()
-
-        period_layout.addWidget(self.date_container)
+        period_layout.addWidget(self.date_stack)
 
         # Week info label
         self.week_info_label = QLabel("")
@@ -287,19 +330,7 @@ class PaymentReportDialog(QDialog):
         generate_btn = QPushButton("📄 Genera PDF")
         generate_btn.setMinimumHeight(38)
         generate_btn.setMinimumWidth(150)
-        generate_btn.setStyleSheet(
-            f"""
-            QPushButton {{
-                background-color: {get_color('primary')};
-                color: white;
-                font-weight: bold;
-                border-radius: 4px;
-            }}
-            QPushButton:hover {{
-                background-color: #1565c0;
-            }}
-            """
-        )
+        generate_btn.setStyleSheet(themed_stylesheet(_GENERATE_BTN_QSS))
         generate_btn.clicked.connect(self.generate_report)
 
         button_layout.addStretch()
@@ -308,42 +339,115 @@ class PaymentReportDialog(QDialog):
 
         main_layout.addLayout(button_layout)
 
+    def _add_date_page(self, period_id: int, widgets: list[QWidget]):
+        """Install a period type's pickers as a page of the date stack"""
+        page = QWidget()
+        page_layout = QHBoxLayout(page)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        for widget in widgets:
+            page_layout.addWidget(widget)
+        page_layout.addStretch()
+        self.date_stack.addWidget(page)
+        self._date_pages[period_id] = page
+
+    def _ensure_day_widgets(self):
+        if self._DAY in self._date_pages:
+            return
+        self.day_label = QLabel("Data:")
+        self.day_picker = QDateEdit()
+        self.day_picker.setCalendarPopup(True)
+        self.day_picker.setDate(self._today)
+        self.day_picker.setDisplayFormat("dd/MM/yyyy")
+        self.day_picker.dateChanged.connect(self.update_preview)
+        self._add_date_page(self._DAY, [self.day_label, self.day_picker])
+
+    def _ensure_week_widgets(self):
+        if self._WEEK in self._date_pages:
+            return
+        self.week_label = QLabel("Settimana:")
+        self.week_spinner = QSpinBox()
+        self.week_spinner.setRange(1, 53)
+        self.week_spinner.setValue(self._iso_week)
+        self.week_spinner.valueChanged.connect(self.update_preview)
+
+        self.week_year_label = QLabel("Anno:")
+        self.week_year_spinner = QSpinBox()
+        self.week_year_spinner.setRange(2020, 2100)
+        self.week_year_spinner.setValue(self._iso_year)
+        self.week_year_spinner.valueChanged.connect(self.update_preview)
+        self._add_date_page(
+            self._WEEK,
+            [
+                self.week_label,
+                self.week_spinner,
+                self.week_year_label,
+                self.week_year_spinner,
+            ],
+        )
+
+    def _ensure_month_widgets(self):
+        if self._MONTH in self._date_pages:
+            return
+        self.month_label = QLabel("Mese:")
+        self.month_combo = QComboBox()
+        months = [
+            "Gennaio",
+            "Febbraio",
+            "Marzo",
+            "Aprile",
+            "Maggio",
+            "Giugno",
+            "Luglio",
+            "Agosto",
+            "Settembre",
+            "Ottobre",
+            "Novembre",
+            "Dicembre",
+        ]
+        self.month_combo.addItems(months)
+        self.month_combo.setCurrentIndex(self._today.month - 1)
+        self.month_combo.currentIndexChanged.connect(self.update_preview)
+
+        self.month_year_label = QLabel("Anno:")
+        self.month_year_spinner = QSpinBox()
+        self.month_year_spinner.setRange(2020, 2100)
+        self.month_year_spinner.setValue(self._today.year)
+        self.month_year_spinner.valueChanged.connect(self.update_preview)
+        self._add_date_page(
+            self._MONTH,
+            [
+                self.month_label,
+                self.month_combo,
+                self.month_year_label,
+                self.month_year_spinner,
+            ],
+        )
+
+    def _ensure_year_widgets(self):
+        if self._YEAR in self._date_pages:
+            return
+        self.year_label = QLabel("Anno:")
+        self.year_spinner = QSpinBox()
+        self.year_spinner.setRange(2020, 2100)
+        self.year_spinner.setValue(self._today.year)
+        self.year_spinner.valueChanged.connect(self.update_preview)
+        self._add_date_page(self._YEAR, [self.year_label, self.year_spinner])
+
+    def _on_period_toggled(self, period_id: int, checked: bool):
+        if checked:
+            self._mode = period_id
+            self.update_date_widgets()
+
     def update_date_widgets(self):
         """Show/hide date widgets based on selected period type"""
-        # Hide all first
-        self.day_label.hide()
-        self.day_picker.hide()
-        self.week_label.hide()
-        self.week_spinner.hide()
-        self.week_year_label.hide()
-        self.week_year_spinner.hide()
-        self.month_label.hide()
-        self.month_combo.hide()
-        self.month_year_label.hide()
-        self.month_year_spinner.hide()
-        self.year_label.hide()
-        self.year_spinner.hide()
-        self.week_info_label.hide()
-
-        # Show relevant widgets
-        if self.day_radio.isChecked():
-            self.day_label.show()
-            self.day_picker.show()
-        elif self.week_radio.isChecked():
-            self.week_label.show()
-            self.week_spinner.show()
-            self.week_year_label.show()
-            self.week_year_spinner.show()
-            self.week_info_label.show()
+        # Create (on first use) the relevant page
+        getattr(self, self._PAGE_BUILDERS[self._mode])()
+        is_week = self._mode == self._WEEK
+        if is_week:
             self.update_week_info()
-        elif self.month_radio.isChecked():
-            self.month_label.show()
-            self.month_combo.show()
-            self.month_year_label.show()
-            self.month_year_spinner.show()
-        elif self.year_radio.isChecked():
-            self.year_label.show()
-            self.year_spinner.show()
+
+        self.date_stack.setCurrentWidget(self._date_pages[self._mode])
+        self.week_info_label.setVisible(is_week)
 
         self.update_preview()
 
@@ -353,7 +457,7 @@ class PaymentReportDialog(QDialog):
             year = self.week_year_spinner.value()
             week = self.week_spinner.value()
             # Get Monday of the ISO week
-            monday = datetime.fromisocalendar(year, week, 1)
+            monday = _iso_week_monday(year, week)
             sunday = monday + timedelta(days=6)
             self.week_info_label.setText(
                 f"Settimana {week} ({monday.strftime('%d/%m/%Y')} - "
@@ -369,95 +473,169 @@ class PaymentReportDialog(QDialog):
         Returns:
             Tuple of (date_from, date_to, period_type, period_label)
         """
-        if self.day_radio.isChecked():
-            selected_date = self.day_picker.date().toPyDate()
-            date_from = datetime.combine(selected_date, datetime.min.time())
-            date_to = datetime.combine(selected_date, datetime.max.time())
-            period_type = "Giorno"
-            period_label = selected_date.strftime("%d/%m/%Y")
-        elif self.week_radio.isChecked():
-            year = self.week_year_spinner.value()
-            week = self.week_spinner.value()
-            monday = datetime.fromisocalendar(year, week, 1)
-            sunday = monday + timedelta(days=6)
-            date_from = datetime.combine(monday.date(), datetime.min.time())
-            date_to = datetime.combine(sunday.date(), datetime.max.time())
-            period_type = "Settimana"
-            period_label = (
-                f"Settimana {week} ({monday.strftime('%d/%m/%Y')} - "
-                f"{sunday.strftime('%d/%m/%Y')})"
-            )
-        elif self.month_radio.isChecked():
-            year = self.month_year_spinner.value()
-            month = self.month_combo.currentIndex() + 1
-            # First day of month
-            date_from = datetime(year, month, 1, 0, 0, 0)
-            # Last day of month
-            if month == 12:
-                date_to = datetime(year, 12, 31, 23, 59, 59)
-            else:
-                date_to = datetime(year, month + 1, 1, 0, 0, 0) - timedelta(seconds=1)
-            period_type = "Mese"
-            period_label = f"{self.month_combo.currentText()} {year}"
-        else:  # year
-            year = self.year_spinner.value()
-            date_from = datetime(year, 1, 1, 0, 0, 0)
-            date_to = datetime(year, 12, 31, 23, 59, 59)
-            period_type = "Anno"
-            period_label = str(year)
-
-        return date_from, date_to, period_type, period_label
+        return getattr(self, self._RANGE_BUILDERS[self._mode])()
+
+    def _range_day(self) -> tuple[datetime, datetime, str, str]:
+        selected_date = self.day_picker.date().toPyDate()
+        return (
+            datetime.combine(selected_date, datetime.min.time()),
+            datetime.combine(selected_date, datetime.max.time()),
+            "Giorno",
+            selected_date.strftime("%d/%m/%Y"),
+        )
+
+    def _range_week(self) -> tuple[datetime, datetime, str, str]:
+        year = self.week_year_spinner.value()
+        week = self.week_spinner.value()
+        monday = _iso_week_monday(year, week)
+        sunday = monday + timedelta(days=6)
+        return (
+            datetime.combine(monday, datetime.min.time()),
+            datetime.combine(sunday, datetime.max.time()),
+            "Settimana",
+            f"Settimana {week} ({monday.strftime('%d/%m/%Y')} - "
+            f"{sunday.strftime('%d/%m/%Y')})",
+        )
+
+    def _range_month(self) -> tuple[datetime, datetime, str, str]:
+        year = self.month_year_spinner.value()
+        month = self.month_combo.currentIndex() + 1
+        # First to last day of month
+        last_day = calendar.monthrange(year, month)[1]
+        return (
+            datetime(year, month, 1, 0, 0, 0),
+            datetime(year, month, last_day, 23, 59, 59),
+            "Mese",
+            f"{self.month_combo.currentText()} {year}",
+        )
+
+    def _range_year(self) -> tuple[datetime, datetime, str, str]:
+        year = self.year_spinner.value()
+        return (
+            datetime(year, 1, 1, 0, 0, 0),
+            datetime(year, 12, 31, 23, 59, 59),
+            "Anno",
+            str(year),
+        )
 
     def update_preview(self):
-        """Update the preview cards with filtered statistics"""
+        """Schedule a preview refresh (debounced)"""
+        self._preview_timer.start()
+
+    def _do_update_preview(self):
+        """Load filtered statistics for the preview cards in background"""
         try:
             date_from, date_to, _, _ = self.get_date_range()
 
             # Update week info if week is selected
-            if self.week_radio.isChecked():
+            if self._mode == self._WEEK:
                 self.update_week_info()
 
-            # Debug: print the date range being used
-            print(f"DEBUG update_preview: date_from={date_from.isoformat()}, date_to={date_to.isoformat()}")
-
-            # Get filtered statistics
-            stats = self.db_manager.get_payment_statistics(
-                date_from=date_from, date_to=date_to
-            )
+            # Signals that leave the range unchanged need no refresh
+            key = (date_from, date_to)
+            if key == self._last_range:
+                return
+            self._last_range = key
 
-            # Debug: print the stats returned
-            print(f"DEBUG stats: {stats}")
+            logger.debug("update_preview: date_from=%s, date_to=%s", date_from, date_to)
 
-            # Update cards
-            self.total_card.update_value(f"{stats['total_revenue']:.2f} €")
-            self.count_card.update_value(str(stats["subscription_count"]))
-            if stats["subscription_count"] > 0:
-                self.average_card.update_value(f"{stats['average_payment']:.2f} €")
-            else:
-                self.average_card.update_value("0.00 €")
+            # Results of superseded requests are discarded on arrival
+            self._preview_request_id += 1
+            if key in self._stats_cache:
+                self._apply_preview_stats(
+                    self._preview_request_id, self._stats_cache[key]
+                )
+                return
 
-            self.pos_card.update_value(str(stats["pos_count"]))
-            self.bollettino_card.update_value(str(stats["bollettino_count"]))
+            thread = PreviewStatsThread(
+                self.db_manager, self._preview_request_id, date_from, date_to
+            )
+            thread.result.connect(
+                lambda request_id, stats: self._apply_preview_stats(
+                    request_id, self._cache_stats(key, stats)
+                )
+            )
+            thread.error.connect(self._on_preview_error)
+            thread.finished.connect(lambda: self._preview_threads.discard(thread))
+            self._preview_threads.add(thread)
+            thread.start()
 
         except Exception as e:
-            print(f"Error updating preview: {e}")
+            logger.warning("Error updating preview: %s", e)
+
+    def _cache_stats(self, key: tuple[datetime, datetime], stats: dict) -> dict:
+        """Store statistics for a date range, evicting the oldest entry if full"""
+        if len(self._stats_cache) >= _STATS_CACHE_SIZE:
+            del self._stats_cache[next(iter(self._stats_cache))]
+        self._stats_cache[key] = stats
+        return stats
+
+    def get_statistics(self, date_from: datetime, date_to: datetime) -> dict:
+        """Return statistics for a date range, querying only on a cache miss"""
+        key = (date_from, date_to)
+        stats = self._stats_cache.get(key)
+        if stats is None:
+            stats = self._cache_stats(
+                key,
+                self.db_manager.get_payment_statistics(
+                    date_from=date_from, date_to=date_to
+                ),
+            )
+        return stats
+
+    def _apply_preview_stats(self, request_id: int, stats: dict):
+        """Update the preview cards with the loaded statistics"""
+        if request_id != self._preview_request_id:
+            return
+
+        logger.debug("update_preview stats: %s", stats)
+
+        # Update cards
+        self.total_card.update_value(f"{stats['total_revenue']:.2f} €")
+        self.count_card.update_value(str(stats["subscription_count"]))
+        if stats["subscription_count"] > 0:
+            self.average_card.update_value(f"{stats['average_payment']:.2f} €")
+        else:
+            self.average_card.update_value("0.00 €")
+
+        self.pos_card.update_value(str(stats["pos_count"]))
+        self.bollettino_card.update_value(str(stats["bollettino_count"]))
+
+    def _on_preview_error(self, request_id: int, message: str):
+        """Report a failed preview load"""
+        if request_id == self._preview_request_id:
+            logger.warning("Error updating preview: %s", message)
+            # Let the next signal retry the same range
+            self._last_range = None
+
+    def done(self, result: int):
+        """Wait for in-flight preview queries before the dialog goes away"""
+        self._preview_timer.stop()
+        for thread in list(self._preview_threads):
+            thread.wait()
+        super().done(result)
 
     def generate_filename(self) -> str:
         """Generate suggested filename based on period selection"""
-        if self.day_radio.isChecked():
-            selected_date = self.day_picker.date().toPyDate()
-            return f"report_pagamenti_{selected_date.strftime('%Y-%m-%d')}.pdf"
-        elif self.week_radio.isChecked():
-            year = self.week_year_spinner.value()
-            week = self.week_spinner.value()
-            return f"report_pagamenti_{year}-W{week:02d}.pdf"
-        elif self.month_radio.isChecked():
-            year = self.month_year_spinner.value()
-            month = self.month_combo.currentIndex() + 1
-            return f"report_pagamenti_{year}-{month:02d}.pdf"
-        else:  # year
-            year = self.year_spinner.value()
-            return f"report_pagamenti_{year}.pdf"
+        return getattr(self, self._FILENAME_BUILDERS[self._mode])()
+
+    def _filename_day(self) -> str:
+        selected_date = self.day_picker.date().toPyDate()
+        return f"report_pagamenti_{selected_date.strftime('%Y-%m-%d')}.pdf"
+
+    def _filename_week(self) -> str:
+        year = self.week_year_spinner.value()
+        week = self.week_spinner.value()
+        return f"report_pagamenti_{year}-W{week:02d}.pdf"
+
+    def _filename_month(self) -> str:
+        year = self.month_year_spinner.value()
+        month = self.month_combo.currentIndex() + 1
+        return f"report_pagamenti_{year}-{month:02d}.pdf"
+
+    def _filename_year(self) -> str:
+        year = self.year_spinner.value()
+        return f"report_pagamenti_{year}.pdf"
 
     def generate_report(self):
         """Generate the PDF report"""
@@ -482,28 +660,15 @@ class PaymentReportDialog(QDialog):
 
             # Get statistics for the selected period
             date_from, date_to, period_type, period_label = self.get_date_range()
-            stats = self.db_manager.get_payment_statistics(
-                date_from=date_from, date_to=date_to
-            )
+            stats = self.get_statistics(date_from, date_to)
 
             # Calculate revenue by payment method
-            subs = self.db_manager._get_subscriptions_for_stats(date_from, date_to)
-            pos_revenue = sum(
-                sub["payment_details"]
-                for sub in subs
-                if self.db_manager._normalize_payment_method(
-                    sub.get("payment_method", "")
-                )
-                == "POS"
-            )
-            bollettino_revenue = sum(
-                sub["payment_details"]
-                for sub in subs
-                if self.db_manager._normalize_payment_method(
-                    sub.get("payment_method", "")
-                )
-                == "BOLLETTINO"
-            )
+            pos_revenue = bollettino_revenue = 0.0
+            for amount, code in self.db_manager.iter_stats_rows(date_from, date_to):
+                if code == DatabaseManager.METHOD_POS:
+                    pos_revenue += amount
+                elif code == DatabaseManager.METHOD_BOLLETTINO:
+                    bollettino_revenue += amount
 
             # Store the data for the parent to use
             self.stats = stats
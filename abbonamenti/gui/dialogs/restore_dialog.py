@@ -1,10 +1,21 @@
 """
 Restore dialog for restoring encrypted database backups
 """
+import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-import hashlib
+from typing import Optional
 
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import (
+    QCoreApplication,
+    QMetaObject,
+    Qt,
+    QThread,
+    QTimer,
+    pyqtSignal,
+    pyqtSlot,
+)
 from PyQt6.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -21,34 +32,133 @@ from PyQt6.QtWidgets import (
 
 from abbonamenti.database.manager import DatabaseManager
 from abbonamenti.gui.styles import get_stylesheet
+from abbonamenti.security.crypto import (
+    HEADER_LEN,
+    MAGIC,
+    MIN_PASSPHRASE_LEN,
+    VERSION_DB_BACKUP,
+    derive_auto_backup_passphrase,
+    derive_key_from_passphrase,
+)
 from abbonamenti.utils.paths import get_backups_dir
 from abbonamenti.utils.paths import get_keys_dir
 
+_WARNING_QSS = (
+    "color: #d32f2f; background: #ffebee; padding: 12px; "
+    "border-radius: 4px; font-weight: bold;"
+)
+_RESTORE_BTN_QSS = (
+    "QPushButton { background: #f44336; color: white; font-weight: bold; "
+    "padding: 8px 24px; } "
+    "QPushButton:hover { background: #d32f2f; } "
+    "QPushButton:disabled { background: #ccc; }"
+)
+
+
+@lru_cache(maxsize=1)
+def _hmac_key_path() -> Path:
+    return get_keys_dir() / "hmac_key.bin"
+
+
+def _read_auto_backup_passphrase() -> str:
+    """Derive the auto-backup passphrase from the HMAC key on disk"""
+    hmac_key_path = _hmac_key_path()
+    # Unbuffered read straight into a buffer we own, so the key can be wiped
+    with open(hmac_key_path, "rb", buffering=0) as f:
+        hmac_key = bytearray(os.fstat(f.fileno()).st_size)
+        del hmac_key[f.readinto(hmac_key):]
+    try:
+        return derive_auto_backup_passphrase(hmac_key)
+    finally:
+        hmac_key[:] = bytes(len(hmac_key))
+
+
+@dataclass(slots=True, frozen=True)
+class RestorePayload:
+    """Inputs of a restore, fixed once the worker starts"""
+    db_manager: DatabaseManager
+    backup_path: Path
+    passphrase: Optional[str]
+    # Auto-backups: derive the passphrase from the HMAC key in the worker
+    derive_auto: bool = False
+    # Backup key, if already derived by AutoBackupKeyThread
+    key: Optional[bytes] = None
+
 
 class RestoreThread(QThread):
     """Background thread for performing restore"""
     progress = pyqtSignal(int, int, str)  # step, total_steps, message
     finished = pyqtSignal(bool, str)  # success, message
     
-    def __init__(self, db_manager: DatabaseManager, backup_path: Path, passphrase: str):
+    def __init__(self, payload: RestorePayload):
         super().__init__()
-        self.db_manager = db_manager
-        self.backup_path = backup_path
-        self.passphrase = passphrase
+        self.payload: Optional[RestorePayload] = payload
     
     def run(self):
         """Perform restore in background"""
+        payload = self.payload
+        passphrase = payload.passphrase
+        if payload.derive_auto and payload.key is None:
+            try:
+                passphrase = _read_auto_backup_passphrase()
+            except FileNotFoundError as exc:
+                self.finished.emit(
+                    False,
+                    "Chiave HMAC mancante, impossibile derivare la password "
+                    f"per i backup automatici:\n{exc}",
+                )
+                return
         try:
-            success, result = self.db_manager.restore_secure_backup(
-                self.backup_path,
-                self.passphrase,
-                progress_callback=self.progress.emit
+            success, result = payload.db_manager.restore_secure_backup(
+                payload.backup_path,
+                passphrase,
+                progress_callback=self.progress.emit,
+                key=payload.key,
             )
             self.finished.emit(success, result)
         except Exception as e:
             self.finished.emit(False, str(e))
 
 
+class AutoBackupKeyThread(QThread):
+    """Background thread deriving an auto-backup's key ahead of the restore"""
+    result = pyqtSignal(str, bytes)  # backup path, derived key
+
+    def __init__(self, backup_path: str):
+        super().__init__()
+        self.backup_path = backup_path
+
+    def run(self):
+        try:
+            with open(self.backup_path, "rb") as f:
+                header = f.read(HEADER_LEN)
+            if (
+                len(header) != HEADER_LEN
+                or not header.startswith(MAGIC)
+                or header[len(MAGIC)] != VERSION_DB_BACKUP
+            ):
+                return
+            salt = header[len(MAGIC) + 1:]
+            key, _ = derive_key_from_passphrase(_read_auto_backup_passphrase(), salt)
+        except (OSError, ValueError):
+            # Leave it to the restore itself to report the problem
+            return
+        self.result.emit(self.backup_path, key)
+
+
+# Key derivations abandoned by a closed dialog, kept alive until they return
+_detached_key_threads: set[AutoBackupKeyThread] = set()
+
+
+def _detach_key_thread(thread: AutoBackupKeyThread):
+    """Let an abandoned key derivation finish without blocking the GUI on it"""
+    _detached_key_threads.add(thread)
+    thread.finished.connect(lambda: _detached_key_threads.discard(thread))
+    thread.finished.connect(thread.deleteLater)
+    # A QThread must not be destroyed while running, even on quit
+    QCoreApplication.instance().aboutToQuit.connect(thread.wait)
+
+
 class RestoreDialog(QDialog):
     """Dialog for restoring encrypted backups"""
     
@@ -58,6 +168,20 @@ class RestoreDialog(QDialog):
         super().__init__(parent)
         self.db_manager = db_manager
         self.restore_thread = None
+        # Whether file_input points to an existing .enc file; refreshed on change
+        self._backup_file_ok = False
+        # Last (path text, is auto-backup) pair, see _is_auto_backup_cached
+        self._auto_backup_cache: Optional[tuple[str, bool]] = None
+        # Whether the selected file is an auto-backup (no passphrase needed)
+        self._is_auto_backup_active = False
+        # Last validation hint applied to the widgets ("" = inputs valid)
+        self._last_hint: Optional[str] = None
+        # Key derivation for a selected auto-backup, started before the click
+        self._key_thread: Optional[AutoBackupKeyThread] = None
+        self._key_thread_path: Optional[str] = None
+        self._prewarmed_key: Optional[tuple[str, bytes]] = None
+        # Error box, created on the first failure and reused on retries
+        self._error_box: Optional[QMessageBox] = None
         self.init_ui()
     
     def init_ui(self):
@@ -66,6 +190,12 @@ class RestoreDialog(QDialog):
         self.setMinimumHeight(350)
         self.setStyleSheet(get_stylesheet())
         
+        # Coalesce bursts of text changes into a single validation
+        self._validate_timer = QTimer(self)
+        self._validate_timer.setSingleShot(True)
+        self._validate_timer.setInterval(50)
+        self._validate_timer.timeout.connect(self.validate_inputs)
+
         layout = QVBoxLayout(self)
         layout.setSpacing(16)
         
@@ -75,10 +205,7 @@ class RestoreDialog(QDialog):
             "Prima del ripristino verrà creato un backup automatico dei file attuali."
         )
         warning_label.setWordWrap(True)
-        warning_label.setStyleSheet(
-            "color: #d32f2f; background: #ffebee; padding: 12px; "
-            "border-radius: 4px; font-weight: bold;"
-        )
+        warning_label.setStyleSheet(_WARNING_QSS)
         layout.addWidget(warning_label)
         
         # Backup file group
@@ -110,7 +237,7 @@ class RestoreDialog(QDialog):
         self.passphrase_input = QLineEdit()
         self.passphrase_input.setEchoMode(QLineEdit.EchoMode.Password)
         self.passphrase_input.setPlaceholderText("Inserisci passphrase")
-        self.passphrase_input.textChanged.connect(self.validate_inputs)
+        self.passphrase_input.textChanged.connect(self.schedule_validate)
         pass_layout.addRow("Passphrase *:", self.passphrase_input)
 
         self.auto_backup_label = QLabel()
@@ -131,6 +258,13 @@ class RestoreDialog(QDialog):
         self.progress_label.setStyleSheet("color: #666; font-size: 11px;")
         layout.addWidget(self.progress_label)
         
+        # Why the restore button is disabled, if it is
+        self.hint_label = QLabel("")
+        self.hint_label.setWordWrap(True)
+        self.hint_label.setVisible(False)
+        self.hint_label.setStyleSheet("color: #666; font-size: 11px;")
+        layout.addWidget(self.hint_label)
+
         # Buttons
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -142,12 +276,7 @@ class RestoreDialog(QDialog):
         self.restore_btn = QPushButton("Ripristina Backup")
         self.restore_btn.setEnabled(False)
         self.restore_btn.clicked.connect(self.start_restore)
-        self.restore_btn.setStyleSheet(
-            "QPushButton { background: #f44336; color: white; font-weight: bold; "
-            "padding: 8px 24px; } "
-            "QPushButton:hover { background: #d32f2f; } "
-            "QPushButton:disabled { background: #ccc; }"
-        )
+        self.restore_btn.setStyleSheet(_RESTORE_BTN_QSS)
         button_layout.addWidget(self.restore_btn)
         
         layout.addLayout(button_layout)
@@ -161,59 +290,94 @@ class RestoreDialog(QDialog):
             "Backup Files (*.enc);;All Files (*)"
         )
         if file_path:
+            # on_file_changed runs the auto-backup check when the text changes
             self.file_input.setText(file_path)
-            self.check_auto_backup(file_path)
-            self.validate_inputs()
+            self.schedule_validate()
 
     def on_file_changed(self, text: str):
         """React to manual edits or programmatic changes of the file path."""
-        if text:
-            self.check_auto_backup(text)
-        else:
-            # Reset state when cleared
+        if not text.endswith(".enc"):
+            # Cleared or not a backup: reset state without touching the disk
+            self._backup_file_ok = False
+            self._is_auto_backup_active = False
             self.auto_backup_label.setVisible(False)
             self.passphrase_input.setEnabled(True)
-        self.validate_inputs()
+        else:
+            self._backup_file_ok = os.path.isfile(text)
+            self.check_auto_backup(text)
+        self.schedule_validate()
+
+    def schedule_validate(self):
+        """Schedule input validation (debounced)"""
+        self._validate_timer.start()
     
     def validate_inputs(self):
         """Validate file and passphrase"""
-        has_file = bool(self.file_input.text())
-        is_auto_backup = self.auto_backup_label.isVisible()
-        has_passphrase = bool(self.passphrase_input.text()) or is_auto_backup
-        
-        self.restore_btn.setEnabled(has_file and has_passphrase)
+        hint = self._input_hint()
+        # Only touch the widgets when the outcome changes
+        if hint == self._last_hint:
+            return
+        self._last_hint = hint
+        self.hint_label.setText(hint)
+        self.hint_label.setVisible(bool(hint))
+        self.restore_btn.setEnabled(not hint)
+
+    def _input_hint(self) -> str:
+        """Return why the inputs are not valid yet, or "" if they are"""
+        if not self.file_input.text():
+            return "Seleziona un file di backup .enc"
+        if not self._backup_file_ok:
+            return "Il file selezionato non esiste o non è un backup .enc"
+        # Shorter passphrases are rejected before the (slow) key derivation
+        passphrase_short = len(self.passphrase_input.text()) < MIN_PASSPHRASE_LEN
+        if not self._is_auto_backup_active and passphrase_short:
+            return (
+                "La passphrase deve contenere almeno "
+                f"{MIN_PASSPHRASE_LEN} caratteri"
+            )
+        return ""
     
     def start_restore(self):
         """Start restore process with confirmation"""
-        # Final confirmation
-        reply = QMessageBox.warning(
-            self,
-            "Conferma Ripristino",
+        # Final confirmation, shown window-modal without a nested event loop
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("Conferma Ripristino")
+        box.setText(
             "Sei sicuro di voler ripristinare il backup?\n\n"
             "Il database e le chiavi correnti verranno sostituiti!\n"
-            "Un backup automatico dei file correnti verrà creato prima del ripristino.",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            QMessageBox.StandardButton.No
+            "Un backup automatico dei file correnti verrà creato prima del ripristino."
         )
-        
+        box.setStandardButtons(
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        box.setDefaultButton(QMessageBox.StandardButton.No)
+        box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        box.buttonClicked.connect(
+            lambda button: self._on_confirm(box.standardButton(button))
+        )
+        box.open()
+
+    def _on_confirm(self, reply: QMessageBox.StandardButton):
+        """Run the restore once the user has confirmed it"""
         if reply != QMessageBox.StandardButton.Yes:
             return
         
         backup_path = Path(self.file_input.text())
-        try:
-            passphrase = self._get_restore_passphrase(backup_path)
-        except FileNotFoundError as exc:
-            QMessageBox.critical(
-                self,
-                "Chiave HMAC mancante",
-                f"Impossibile derivare la password per i backup automatici:\n{exc}"
-            )
-            return
+        # Auto-backup passphrases are derived by the worker, off the GUI thread
+        derive_auto = self._is_auto_backup_cached(self.file_input.text())
+        passphrase = None if derive_auto else self.passphrase_input.text()
+        key = None
+        if derive_auto and self._prewarmed_key is not None:
+            prewarmed_path, prewarmed_key = self._prewarmed_key
+            if prewarmed_path == self.file_input.text():
+                key = prewarmed_key
         
-        # Disable inputs
+        # Disable inputs (the restore cannot be interrupted once started)
         self.passphrase_input.setEnabled(False)
         self.file_input.setEnabled(False)
         self.restore_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
         
         # Show progress
         self.progress_bar.setVisible(True)
@@ -222,7 +386,9 @@ class RestoreDialog(QDialog):
         self.progress_label.setVisible(True)
         
         # Start restore thread
-        self.restore_thread = RestoreThread(self.db_manager, backup_path, passphrase)
+        self.restore_thread = RestoreThread(
+            RestorePayload(self.db_manager, backup_path, passphrase, derive_auto, key)
+        )
         self.restore_thread.progress.connect(self.on_progress)
         self.restore_thread.finished.connect(self.on_finished)
         self.restore_thread.start()
@@ -234,6 +400,16 @@ class RestoreDialog(QDialog):
     
     def on_finished(self, success: bool, result: str):
         """Handle restore completion"""
+        # Release the worker (and its DatabaseManager reference); run() has
+        # already emitted its result, so the wait is only for it to return
+        thread = self.restore_thread
+        self.restore_thread = None
+        if thread is not None:
+            thread.wait()
+            # Don't keep secrets alive until the deferred delete runs
+            thread.payload = None
+            thread.deleteLater()
+
         if success:
             QMessageBox.information(
                 self,
@@ -241,24 +417,56 @@ class RestoreDialog(QDialog):
                 f"{result}\n\n"
                 "I dati verranno ricaricati automaticamente."
             )
-            self.restore_completed.emit()
+            # Close first; receivers reload data on the next event loop pass
             self.accept()
-        else:
-            QMessageBox.critical(
-                self,
-                "Errore Ripristino",
-                f"Impossibile ripristinare il backup:\n\n{result}"
+            QMetaObject.invokeMethod(
+                self, "_emit_completed", Qt.ConnectionType.QueuedConnection
             )
+        else:
+            if self._error_box is None:
+                self._error_box = QMessageBox(
+                    QMessageBox.Icon.Critical,
+                    "Errore Ripristino",
+                    "",
+                    QMessageBox.StandardButton.Ok,
+                    self,
+                )
+            self._error_box.setText(f"Impossibile ripristinare il backup:\n\n{result}")
+            self._error_box.exec()
             # Re-enable inputs
             self.passphrase_input.setEnabled(True)
             self.file_input.setEnabled(True)
             self.restore_btn.setEnabled(True)
+            self.cancel_btn.setEnabled(True)
             self.progress_bar.setVisible(False)
             self.progress_label.setVisible(False)
 
+    @pyqtSlot()
+    def _emit_completed(self):
+        self.restore_completed.emit()
+
+    def _is_restoring(self) -> bool:
+        return self.restore_thread is not None and self.restore_thread.isRunning()
+
+    def reject(self):
+        """Ignore Esc / close requests while a restore is in progress"""
+        if self._is_restoring():
+            return
+        super().reject()
+
+    def closeEvent(self, event):
+        """Give a finishing restore a moment to complete before closing"""
+        if self._is_restoring():
+            self.restore_thread.wait(2000)
+            if self._is_restoring():
+                event.ignore()
+                return
+        super().closeEvent(event)
+
     def check_auto_backup(self, file_path: str):
         """Check if file is an auto-backup and derive password automatically"""
-        is_auto_backup = self._is_auto_backup(Path(file_path))
+        is_auto_backup = self._is_auto_backup_cached(file_path)
+        self._is_auto_backup_active = is_auto_backup
         
         if is_auto_backup:
             self.auto_backup_label.setText(
@@ -267,35 +475,77 @@ class RestoreDialog(QDialog):
             self.auto_backup_label.setVisible(True)
             self.passphrase_input.setEnabled(False)
             self.passphrase_input.clear()
+            self._prewarm_auto_backup_key(file_path)
         else:
             self.auto_backup_label.setVisible(False)
             self.passphrase_input.setEnabled(True)
 
-    def _get_restore_passphrase(self, backup_path: Path) -> str:
-        """Get passphrase for restore, deriving from HMAC key if auto-backup"""
-        if self._is_auto_backup(backup_path):
-            # Derive password from HMAC key for auto-backups
-            hmac_key_path = get_keys_dir() / "hmac_key.bin"
-            if not hmac_key_path.exists():
-                raise FileNotFoundError(str(hmac_key_path))
-            with open(hmac_key_path, "rb") as f:
-                hmac_key = f.read()
-            return hashlib.sha256(hmac_key + b"auto_backup_salt").hexdigest()[:32]
-        
-        # Return user-entered passphrase for manual backups
-        return self.passphrase_input.text()
+    def _prewarm_auto_backup_key(self, file_path: str):
+        """Derive the auto-backup key in background while the user confirms"""
+        # One derivation at a time, and only once per selected file
+        if self._key_thread is not None or file_path == self._key_thread_path:
+            return
+        self._key_thread_path = file_path
+        self._key_thread = AutoBackupKeyThread(file_path)
+        self._key_thread.result.connect(self._on_key_prewarmed)
+        self._key_thread.finished.connect(self._on_key_thread_finished)
+        self._key_thread.start()
+
+    def _on_key_prewarmed(self, file_path: str, key: bytes):
+        # A result still queued from a thread detached by done() is dropped
+        if self.sender() is not self._key_thread:
+            return
+        self._prewarmed_key = (file_path, key)
 
-    def _is_auto_backup(self, path: Path) -> bool:
+    def _on_key_thread_finished(self):
+        thread = self._key_thread
+        self._key_thread = None
+        thread.deleteLater()
+        # The selection may have moved on while the previous key was derived
+        if self._is_auto_backup_active:
+            self._prewarm_auto_backup_key(self.file_input.text())
+
+    def done(self, result: int):
+        """Detach a running key derivation and drop secrets on close"""
+        thread = self._key_thread
+        if thread is not None:
+            # Detach first so a late result cannot store the key again
+            self._key_thread = None
+            thread.result.disconnect(self._on_key_prewarmed)
+            thread.finished.disconnect(self._on_key_thread_finished)
+            _detach_key_thread(thread)
+        self._key_thread_path = None
+        self._prewarmed_key = None
+        self.passphrase_input.clear()
+        super().done(result)
+
+    def _is_auto_backup_cached(self, path_str: str) -> bool:
+        """_is_auto_backup for a path string, reusing the result for the same text"""
+        cache = self._auto_backup_cache
+        if cache is not None and cache[0] == path_str:
+            return cache[1]
+        is_auto_backup = self._is_auto_backup(path_str)
+        self._auto_backup_cache = (path_str, is_auto_backup)
+        return is_auto_backup
+
+    def _is_auto_backup(self, path: str | Path) -> bool:
         """Return True if the selected .enc file is an auto-backup.
 
         Recognizes either a file named "auto_backup_*.enc" or a file contained in a
         folder named "auto_backup_*" (common layout: auto_backup_xxx/scalea_backup_xxx.enc).
         """
-        if path.suffix != ".enc":
+        # Plain string scan: no intermediate Path objects for name/parent
+        s = os.fspath(path)
+        if os.sep != "/":
+            s = s.replace(os.sep, "/")
+        if not s.endswith(".enc"):
             return False
 
-        if path.name.startswith("auto_backup_"):
+        slash = s.rfind("/")
+        if s.startswith("auto_backup_", slash + 1):
             return True
+        if slash <= 0:
+            return False
 
-        parent = path.parent
-        return parent.name.startswith("auto_backup_")
+        parent_slash = s.rfind("/", 0, slash)
+        return s.startswith("auto_backup_", parent_slash + 1)
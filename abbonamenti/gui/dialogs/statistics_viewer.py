@@ -1,16 +1,18 @@
 """
 Statistics viewer dialog with payment analytics and charts
 """
+from collections import OrderedDict
 from datetime import datetime
+from string import Template
 from typing import Optional
 
 import matplotlib
 matplotlib.use('QtAgg')
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+from matplotlib.ticker import FixedLocator, FuncFormatter
 
-from PyQt6.QtCore import Qt, pyqtSlot, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSlot, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
     QComboBox,
@@ -26,7 +28,56 @@ from PyQt6.QtWidgets import (
 )
 
 from abbonamenti.database.manager import DatabaseManager
-from abbonamenti.gui.styles import get_stylesheet, get_color
+from abbonamenti.gui.styles import get_color, get_stylesheet, themed_stylesheet
+
+# Maximum number of (year, month) filters whose statistics are kept
+_STATS_CACHE_SIZE = 16
+
+# Loads faster than this never show the progress dialog
+_LOADING_DIALOG_DELAY_MS = 300
+
+# Filter changes within this interval are collapsed into one load
+_FILTER_DEBOUNCE_MS = 150
+
+# Index-based x axes show about this many ticks, plus the last entry
+_MAX_INDEX_TICKS = 10
+
+# Stylesheet templates, substituted once per theme by themed_stylesheet()
+_PRIMARY_TEXT_QSS = Template("color: $primary;")
+_STAT_CARD_QSS = Template(
+    """
+    StatCard {
+        background-color: $card_bg;
+        border: 1px solid $border;
+        border-radius: 8px;
+    }
+    StatCard:hover {
+        border: 1px solid $primary;
+    }
+    """
+)
+_TABS_QSS = Template(
+    """
+    QTabWidget::pane {
+        border: 1px solid $border;
+        background-color: $card_bg;
+        border-radius: 4px;
+    }
+    QTabBar::tab {
+        padding: 8px 16px;
+        margin-right: 2px;
+        background: $surface;
+        color: $text_primary;
+    }
+    QTabBar::tab:selected {
+        background-color: $primary;
+        color: white;
+    }
+    QTabBar::tab:hover:!selected {
+        background-color: $light;
+    }
+    """
+)
 
 
 class StatisticsLoaderThread(QThread):
@@ -39,17 +90,20 @@ class StatisticsLoaderThread(QThread):
         self.db_manager = db_manager
         self.year = year
         self.month = month
+        self._abort = False
+
+    def abort(self):
+        """Ask the thread to stop; results computed afterwards are dropped"""
+        self._abort = True
     
     def run(self):
         """Load statistics in background"""
         try:
-            stats = {
-                "payment_stats": self.db_manager.get_payment_statistics(self.year, self.month),
-                "monthly_revenue": self.db_manager.get_monthly_revenue(self.year, self.month),
-                "methods_breakdown": self.db_manager.get_payment_methods_breakdown(self.year, self.month),
-                "trend": self.db_manager.get_revenue_trend(self.year, self.month),
-                "subscriptions": self.db_manager.get_subscriptions_per_month(self.year, self.month),
-            }
+            if self._abort:
+                return
+            stats = self.db_manager.get_all_statistics(self.year, self.month)
+            if self._abort:
+                return
             self.finished.emit(stats)
         except Exception as e:
             self.error.emit(str(e))
@@ -75,7 +129,7 @@ class StatCard(QWidget):
         value_font.setPointSize(24)
         value_font.setBold(True)
         self.value_label.setFont(value_font)
-        self.value_label.setStyleSheet(f"color: {get_color('primary')};")
+        self.value_label.setStyleSheet(themed_stylesheet(_PRIMARY_TEXT_QSS))
         layout.addWidget(self.value_label)
         
         # Subtitle - store reference for updates
@@ -86,18 +140,7 @@ class StatCard(QWidget):
             layout.addWidget(self.subtitle_label)
         
         # Styling
-        self.setStyleSheet(
-            f"""
-            StatCard {{
-                background-color: {get_color('card_bg')};
-                border: 1px solid {get_color('border')};
-                border-radius: 8px;
-            }}
-            StatCard:hover {{
-                border: 1px solid {get_color('primary')};
-            }}
-            """
-        )
+        self.setStyleSheet(themed_stylesheet(_STAT_CARD_QSS))
     
     def update_value(self, value: str):
         """Update the value displayed in the card"""
@@ -112,9 +155,16 @@ class StatCard(QWidget):
 class ChartWidget(QWidget):
     """Widget for displaying matplotlib charts"""
     
+    # Theme colors used by the charts, looked up once per widget
+    _PALETTE_KEYS = ("text_primary", "border", "surface", "primary", "warning",
+                     "success", "card_bg")
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.figure = Figure(figsize=(8, 6), dpi=100, facecolor=get_color("card_bg"))
+        self._palette = {key: get_color(key) for key in self._PALETTE_KEYS}
+        # Constrained layout is solved at draw time, so updaters need no tight_layout()
+        self.figure = Figure(figsize=(8, 6), dpi=100, layout="constrained",
+                             facecolor=self._palette["card_bg"])
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setStyleSheet("background: transparent;")
         
@@ -122,27 +172,99 @@ class ChartWidget(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.canvas)
         self.setAutoFillBackground(False)
+
+        # Axes and data artists kept across refreshes (see reset_axes)
+        self.ax = None
+        self.primary_artist = None
+        # What primary_artist shows (e.g. bar labels); None = nothing reusable
+        self.primary_key = None
+        self.value_labels = []
+        # Labels shown by an index-based x axis (see set_index_labels)
+        self._labels = ()
+        # Data of the last render (see is_unchanged)
+        self._last_sig = None
     
-    def clear(self):
-        """Clear the figure"""
-        self.figure.clear()
+    def is_unchanged(self, sig) -> bool:
+        """Return True if sig matches the last render, otherwise remember it"""
+        if sig == self._last_sig:
+            return True
+        self._last_sig = sig
+        return False
+
+    def ensure_axes(self):
+        """Return the chart axes, creating them on first use"""
+        if self.ax is None:
+            self.ax = self.figure.add_subplot(111)
+        return self.ax
+
+    def reset_axes(self):
+        """Return empty axes, dropping every artist drawn so far"""
+        ax = self.ensure_axes()
+        ax.clear()
+        self.primary_artist = None
+        self.primary_key = None
+        self.value_labels = []
+        return ax
+
+    def update_bars(self, labels: tuple, values: list, colors: list) -> bool:
+        """Update the bars in place if they show the same labels"""
+        if self.primary_key != ("bars", labels):
+            return False
+        for bar, value, color in zip(self.primary_artist, values, colors):
+            bar.set_height(value)
+            bar.set_facecolor(color)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        return True
+
+    def set_bar_labels(self, values, fmt: str):
+        """Write each positive bar value above it, replacing older labels"""
+        for text in self.value_labels:
+            text.remove()
+        format_value = fmt.format
+        labels = [format_value(v) if v > 0 else '' for v in values]
+        self.value_labels = self.ax.bar_label(
+            self.primary_artist, labels=labels, fontsize=9, padding=2
+        )
     
+    def _format_index_label(self, x, _pos) -> str:
+        """Map an integer x position to its entry in self._labels"""
+        i = int(x)
+        return self._labels[i] if 0 <= i < len(self._labels) else ''
+
+    def use_index_labels(self, ax):
+        """Format integer x positions with their entry in self._labels"""
+        ax.xaxis.set_major_formatter(FuncFormatter(self._format_index_label))
+        ax.tick_params(axis="x", labelrotation=45)
+
+    def set_index_labels(self, ax, labels):
+        """Show labels on x positions 0..n-1, thinned but always keeping the last"""
+        self._labels = labels
+        last = len(labels) - 1
+        step = max(1, -(-len(labels) // _MAX_INDEX_TICKS))
+        ticks = list(range(0, last, step))
+        ticks.append(last)
+        ax.xaxis.set_major_locator(FixedLocator(ticks))
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+
     def draw(self):
-        """Redraw the canvas"""
-        self.canvas.draw()
+        """Schedule a redraw of the canvas (coalesced until Qt is idle)"""
+        self.canvas.draw_idle()
 
     def style_axes(self, ax):
         """Apply theme-aware colors to axes"""
-        ax.set_facecolor(get_color("surface"))
-        ax.tick_params(colors=get_color("text_primary"))
+        text_color = self._palette["text_primary"]
+        ax.set_facecolor(self._palette["surface"])
+        ax.tick_params(colors=text_color)
         for spine in ax.spines.values():
-            spine.set_color(get_color("border"))
-        ax.xaxis.label.set_color(get_color("text_primary"))
-        ax.yaxis.label.set_color(get_color("text_primary"))
-        ax.title.set_color(get_color("text_primary"))
+            spine.set_color(self._palette["border"])
+        ax.xaxis.label.set_color(text_color)
+        ax.yaxis.label.set_color(text_color)
+        ax.title.set_color(text_color)
 
     def style_grid(self, ax):
-        grid_color = get_color("border")
+        grid_color = self._palette["border"]
         ax.grid(True, alpha=0.3, linestyle="--", color=grid_color)
 
 
@@ -153,7 +275,26 @@ class StatisticsViewer(QDialog):
         super().__init__(parent)
         self.db_manager = db_manager
         self.loader_thread = None
+        # Superseded loader threads, kept alive until they stop running
+        self._stale_threads: list[StatisticsLoaderThread] = []
+        # Bumped on every load; results from older requests are ignored
+        self._request_epoch = 0
+        # Statistics last shown, and tab indexes whose chart is not drawn yet
+        self._pending_chart_data: Optional[dict] = None
+        self._chart_dirty: set[int] = set()
         self.progress_dialog = None
+        self._loading_timer = QTimer(self)
+        self._loading_timer.setSingleShot(True)
+        self._loading_timer.setInterval(_LOADING_DIALOG_DELAY_MS)
+        self._loading_timer.timeout.connect(self._show_progress_dialog)
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(_FILTER_DEBOUNCE_MS)
+        self._reload_timer.timeout.connect(self.load_statistics)
+        # Loaded statistics by (year, month), most recently used last
+        self._stats_cache: OrderedDict[tuple[Optional[int], Optional[int]], dict] = (
+            OrderedDict()
+        )
         self.init_ui()
         self.load_statistics()
     
@@ -199,7 +340,7 @@ class StatisticsViewer(QDialog):
         # Refresh button
         refresh_btn = QPushButton("🔄 Aggiorna")
         refresh_btn.setMinimumHeight(32)
-        refresh_btn.clicked.connect(self.load_statistics)
+        refresh_btn.clicked.connect(self.refresh_statistics)
         header_layout.addWidget(refresh_btn)
         
         main_layout.addLayout(header_layout)
@@ -222,28 +363,7 @@ class StatisticsViewer(QDialog):
         
         # Tabs for different charts
         self.tabs = QTabWidget()
-        self.tabs.setStyleSheet(
-            f"""
-            QTabWidget::pane {{
-                border: 1px solid {get_color('border')};
-                background-color: {get_color('card_bg')};
-                border-radius: 4px;
-            }}
-            QTabBar::tab {{
-                padding: 8px 16px;
-                margin-right: 2px;
-                background: {get_color('surface')};
-                color: {get_color('text_primary')};
-            }}
-            QTabBar::tab:selected {{
-                background-color: {get_color('primary')};
-                color: white;
-            }}
-            QTabBar::tab:hover:!selected {{
-                background-color: {get_color('light')};
-            }}
-            """
-        )
+        self.tabs.setStyleSheet(themed_stylesheet(_TABS_QSS))
         
         # Monthly revenue chart
         self.monthly_chart = ChartWidget()
@@ -261,6 +381,15 @@ class StatisticsViewer(QDialog):
         self.subscriptions_chart = ChartWidget()
         self.tabs.addTab(self.subscriptions_chart, "📅 Abbonamenti per Mese")
         
+        # Tab index -> (chart updater, stats key); hidden tabs are drawn when selected
+        self._chart_updaters = [
+            (self.update_monthly_chart_with_data, "monthly_revenue"),
+            (self.update_methods_chart_with_data, "methods_breakdown"),
+            (self.update_trend_chart_with_data, "trend"),
+            (self.update_subscriptions_chart_with_data, "subscriptions"),
+        ]
+        self.tabs.currentChanged.connect(self._render_tab)
+
         main_layout.addWidget(self.tabs)
         
         # Close button
@@ -277,8 +406,8 @@ class StatisticsViewer(QDialog):
     
     @pyqtSlot()
     def on_filter_changed(self):
-        """Handle filter changes"""
-        self.load_statistics()
+        """Handle filter changes (debounced)"""
+        self._reload_timer.start()
     
     def get_filter_dates(self) -> tuple[Optional[int], Optional[int]]:
         """Get year and month from filters"""
@@ -291,7 +420,10 @@ class StatisticsViewer(QDialog):
         return year, month
     
     def show_loading(self):
-        """Show loading progress dialog"""
+        """Show the loading progress dialog if loading takes a while"""
+        self._loading_timer.start()
+
+    def _show_progress_dialog(self):
         if self.progress_dialog is None:
             self.progress_dialog = QProgressDialog(
                 "Elaborating data...", None, 0, 0, self
@@ -300,11 +432,11 @@ class StatisticsViewer(QDialog):
             self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
             self.progress_dialog.setMinimumWidth(300)
             self.progress_dialog.setCancelButton(None)
-            self.progress_dialog.setStyleSheet(get_stylesheet())
         self.progress_dialog.show()
     
     def hide_loading(self):
         """Hide loading progress dialog"""
+        self._loading_timer.stop()
         if self.progress_dialog:
             self.progress_dialog.close()
     
@@ -324,80 +456,148 @@ class StatisticsViewer(QDialog):
         self.average_card.update_value(f"€ {average:,.2f}")
         self.methods_card.update_value(f"{pos_count} / {bollettino_count}")
         
-        # Update charts
-        self.update_monthly_chart_with_data(stats["monthly_revenue"])
-        self.update_methods_chart_with_data(stats["methods_breakdown"])
-        self.update_trend_chart_with_data(stats["trend"])
-        self.update_subscriptions_chart_with_data(stats["subscriptions"])
+        # Update the visible chart now, the others when their tab is selected
+        self._pending_chart_data = stats
+        self._chart_dirty = set(range(len(self._chart_updaters)))
+        self._render_tab(self.tabs.currentIndex())
+
+    @pyqtSlot(int)
+    def _render_tab(self, index: int):
+        """Draw the chart of a tab if it has not seen the latest statistics"""
+        if index not in self._chart_dirty:
+            return
+        self._chart_dirty.discard(index)
+        update, key = self._chart_updaters[index]
+        update(self._pending_chart_data[key])
     
     def on_statistics_error(self, error: str):
         """Handle statistics loading error"""
         self.hide_loading()
         print(f"Error loading statistics: {error}")
     
+    def invalidate_cache(self):
+        """Forget all cached statistics (e.g. after the data changed)"""
+        self._stats_cache.clear()
+
+    def refresh_statistics(self):
+        """Reload statistics from the database, bypassing the cache"""
+        self.invalidate_cache()
+        self.load_statistics()
+
+    def _cache_statistics(self, key: tuple[Optional[int], Optional[int]], stats: dict):
+        """Store statistics for a filter, evicting the least recently used"""
+        self._stats_cache[key] = stats
+        self._stats_cache.move_to_end(key)
+        if len(self._stats_cache) > _STATS_CACHE_SIZE:
+            self._stats_cache.popitem(last=False)
+
+    def _on_loader_finished(
+        self, epoch: int, key: tuple[Optional[int], Optional[int]], stats: dict
+    ):
+        """Cache loaded statistics and show them unless a newer request was made"""
+        self._cache_statistics(key, stats)
+        if epoch == self._request_epoch:
+            self.on_statistics_loaded(stats)
+
+    def _on_loader_error(self, epoch: int, error: str):
+        if epoch == self._request_epoch:
+            self.on_statistics_error(error)
+
+    def _abort_loader(self):
+        """Abandon the running loader thread without blocking on it"""
+        self._stale_threads = [t for t in self._stale_threads if t.isRunning()]
+        if self.loader_thread and self.loader_thread.isRunning():
+            self.loader_thread.abort()
+            self._stale_threads.append(self.loader_thread)
+        self.loader_thread = None
+
     def load_statistics(self):
         """Load statistics in background thread"""
-        # Stop previous thread if running
-        if self.loader_thread and self.loader_thread.isRunning():
-            self.loader_thread.quit()
-            self.loader_thread.wait()
+        # Abandon the previous request; a late result is cached but not shown
+        self._abort_loader()
+        self._request_epoch += 1
+        epoch = self._request_epoch
         
         year, month = self.get_filter_dates()
+        key = (year, month)
+
+        # Filters seen before are rendered straight from the cache
+        if key in self._stats_cache:
+            self._stats_cache.move_to_end(key)
+            self.on_statistics_loaded(self._stats_cache[key])
+            return
         
         # Show loading dialog
         self.show_loading()
         
         # Create and start loader thread
         self.loader_thread = StatisticsLoaderThread(self.db_manager, year, month)
-        self.loader_thread.finished.connect(self.on_statistics_loaded)
-        self.loader_thread.error.connect(self.on_statistics_error)
+        self.loader_thread.finished.connect(
+            lambda stats: self._on_loader_finished(epoch, key, stats)
+        )
+        self.loader_thread.error.connect(
+            lambda error: self._on_loader_error(epoch, error)
+        )
         self.loader_thread.start()
     
+    def done(self, result: int):
+        """Wait for loader threads before the dialog goes away"""
+        self._reload_timer.stop()
+        self._abort_loader()
+        for thread in self._stale_threads:
+            thread.wait()
+        self._stale_threads.clear()
+        super().done(result)
+
     def update_monthly_chart_with_data(self, monthly_data: list[tuple[str, float]]):
         """Update monthly revenue bar chart with provided data"""
         
-        self.monthly_chart.clear()
-        ax = self.monthly_chart.figure.add_subplot(111)
+        chart = self.monthly_chart
+        if chart.is_unchanged(tuple(monthly_data)):
+            return
         
         if monthly_data:
-            months = [data[0] for data in monthly_data]
-            revenues = [data[1] for data in monthly_data]
+            months, revenues = zip(*monthly_data)
             
-            colors = [get_color('primary') if r > 0 else '#BDBDBD' for r in revenues]
-            bars = ax.bar(months, revenues, color=colors, alpha=0.8)
+            primary = chart._palette['primary']
+            colors = [primary if r > 0 else '#BDBDBD' for r in revenues]
+            # Same months as before: only the bar heights change
+            if not chart.update_bars(months, revenues, colors):
+                ax = chart.reset_axes()
+                chart.primary_artist = ax.bar(months, revenues, color=colors, alpha=0.8)
+                chart.primary_key = ("bars", months)
+
+                ax.set_xlabel('Mese', fontsize=11, fontweight='bold')
+                ax.set_ylabel('Incassi (€)', fontsize=11, fontweight='bold')
+                ax.set_title('Incassi Mensili', fontsize=13, fontweight='bold', pad=15)
+                chart.style_grid(ax)
+                ax.set_axisbelow(True)
+            ax = chart.ax
             
             # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                if height > 0:
-                    ax.text(bar.get_x() + bar.get_width()/2., height,
-                           f'€{height:,.0f}',
-                           ha='center', va='bottom', fontsize=9)
-            
-            ax.set_xlabel('Mese', fontsize=11, fontweight='bold')
-            ax.set_ylabel('Incassi (€)', fontsize=11, fontweight='bold')
-            ax.set_title('Incassi Mensili', fontsize=13, fontweight='bold', pad=15)
-            self.monthly_chart.style_grid(ax)
-            ax.set_axisbelow(True)
+            chart.set_bar_labels(revenues, '€{:,.0f}')
         else:
+            ax = chart.reset_axes()
             ax.text(0.5, 0.5, 'Nessun dato disponibile', 
                    ha='center', va='center', fontsize=14, color='#757575',
                    transform=ax.transAxes)
         
         self.monthly_chart.style_axes(ax)
-        self.monthly_chart.figure.tight_layout()
         self.monthly_chart.draw()
     
     def update_methods_chart_with_data(self, methods_data: dict[str, int]):
         """Update payment methods pie chart with provided data"""
         
-        self.methods_chart.clear()
-        ax = self.methods_chart.figure.add_subplot(111)
+        chart = self.methods_chart
+        if chart.is_unchanged(tuple(sorted(methods_data.items()))):
+            return
+        # Pie geometry depends on every value, so it is always rebuilt
+        ax = chart.reset_axes()
         
         if methods_data and any(v > 0 for v in methods_data.values()):
             labels = list(methods_data.keys())
             sizes = list(methods_data.values())
-            colors = [get_color('primary'), get_color('warning')]
+            colors = [chart._palette['primary'], chart._palette['warning']]
             
             wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%',
                                                colors=colors, startangle=90,
@@ -416,80 +616,87 @@ class StatisticsViewer(QDialog):
                    transform=ax.transAxes)
         
         self.methods_chart.style_axes(ax)
-        self.methods_chart.figure.tight_layout()
         self.methods_chart.draw()
     
     def update_trend_chart_with_data(self, trend_data: list[tuple[str, float]]):
         """Update revenue trend line chart with provided data"""
         
-        self.trend_chart.clear()
-        ax = self.trend_chart.figure.add_subplot(111)
+        chart = self.trend_chart
+        if chart.is_unchanged(tuple(trend_data)):
+            return
         
         if trend_data and len(trend_data) > 1:
-            dates = [data[0] for data in trend_data]
-            revenues = [data[1] for data in trend_data]
+            dates, revenues = zip(*trend_data)
+            primary = chart._palette['primary']
 
             # Use numeric x positions to control tick density
             x_positions = list(range(len(dates)))
-            ax.plot(x_positions, revenues, marker='o', linewidth=2,
-                   markersize=6, color=get_color('primary'), label='Incassi')
-            ax.fill_between(x_positions, revenues, alpha=0.3, color=get_color('primary'))
-
-            # Thin x-axis labels to avoid overcrowding (aim for <= 10 labels)
-            max_labels = 10
-            step = max(1, len(dates) // max_labels + (1 if len(dates) % max_labels else 0))
-            tick_idx = list(range(0, len(dates), step))
-            if tick_idx[-1] != len(dates) - 1:
-                tick_idx.append(len(dates) - 1)
-            ax.set_xticks(tick_idx)
-            ax.set_xticklabels([dates[i] for i in tick_idx], rotation=45, ha='right')
-            
-            ax.set_xlabel('Periodo', fontsize=11, fontweight='bold')
-            ax.set_ylabel('Incassi Cumulativi (€)', fontsize=11, fontweight='bold')
-            ax.set_title('Trend Incassi nel Tempo', fontsize=13, fontweight='bold', pad=15)
-            self.trend_chart.style_grid(ax)
-            ax.set_axisbelow(True)
-            ax.legend()
+            if chart.primary_key == "trend":
+                # Reuse the line (and legend); only the filled area is redrawn
+                ax = chart.ax
+                line, fill = chart.primary_artist
+                line.set_data(x_positions, revenues)
+                fill.remove()
+                ax.relim()
+                ax.autoscale_view()
+            else:
+                ax = chart.reset_axes()
+                line, = ax.plot(x_positions, revenues, marker='o', linewidth=2,
+                               markersize=6, color=primary, label='Incassi')
+                ax.set_xlabel('Periodo', fontsize=11, fontweight='bold')
+                ax.set_ylabel('Incassi Cumulativi (€)', fontsize=11, fontweight='bold')
+                ax.set_title('Trend Incassi nel Tempo', fontsize=13,
+                            fontweight='bold', pad=15)
+                chart.style_grid(ax)
+                ax.set_axisbelow(True)
+                ax.legend()
+                # Avoid overcrowding x-axis labels
+                chart.use_index_labels(ax)
+                chart.primary_key = "trend"
+            fill = ax.fill_between(x_positions, revenues, alpha=0.3, color=primary)
+            chart.primary_artist = (line, fill)
+            chart.set_index_labels(ax, dates)
         else:
+            ax = chart.reset_axes()
             ax.text(0.5, 0.5, 'Nessun dato disponibile', 
                    ha='center', va='center', fontsize=14, color='#757575',
                    transform=ax.transAxes)
         
         self.trend_chart.style_axes(ax)
-        self.trend_chart.figure.tight_layout()
         self.trend_chart.draw()
     
     def update_subscriptions_chart_with_data(self, subs_data: list[tuple[str, int]]):
         """Update subscriptions per month chart with provided data"""
         
-        self.subscriptions_chart.clear()
-        ax = self.subscriptions_chart.figure.add_subplot(111)
+        chart = self.subscriptions_chart
+        if chart.is_unchanged(tuple(subs_data)):
+            return
         
         if subs_data:
-            months = [data[0] for data in subs_data]
-            counts = [data[1] for data in subs_data]
+            months, counts = zip(*subs_data)
             
-            bars = ax.bar(months, counts, color=get_color('success'), alpha=0.8)
+            colors = [chart._palette['success']] * len(counts)
+            # Same months as before: only the bar heights change
+            if not chart.update_bars(months, counts, colors):
+                ax = chart.reset_axes()
+                chart.primary_artist = ax.bar(months, counts, color=colors, alpha=0.8)
+                chart.primary_key = ("bars", months)
+
+                ax.set_xlabel('Mese', fontsize=11, fontweight='bold')
+                ax.set_ylabel('Numero Abbonamenti', fontsize=11, fontweight='bold')
+                ax.set_title('Abbonamenti Creati per Mese', fontsize=13,
+                            fontweight='bold', pad=15)
+                chart.style_grid(ax)
+                ax.set_axisbelow(True)
+            ax = chart.ax
             
             # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                if height > 0:
-                    ax.text(bar.get_x() + bar.get_width()/2., height,
-                           f'{int(height)}',
-                           ha='center', va='bottom', fontsize=9)
-            
-            ax.set_xlabel('Mese', fontsize=11, fontweight='bold')
-            ax.set_ylabel('Numero Abbonamenti', fontsize=11, fontweight='bold')
-            ax.set_title('Abbonamenti Creati per Mese', fontsize=13, 
-                        fontweight='bold', pad=15)
-            self.subscriptions_chart.style_grid(ax)
-            ax.set_axisbelow(True)
+            chart.set_bar_labels(counts, '{:.0f}')
         else:
+            ax = chart.reset_axes()
             ax.text(0.5, 0.5, 'Nessun dato disponibile', 
                    ha='center', va='center', fontsize=14, color='#757575',
                    transform=ax.transAxes)
         
         self.subscriptions_chart.style_axes(ax)
-        self.subscriptions_chart.figure.tight_layout()
         self.subscriptions_chart.draw()
@@ -1,7 +1,9 @@
+import string
 import sys
+from collections import OrderedDict
 from datetime import datetime
 
-from PyQt6.QtCore import Qt, pyqtSlot
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
 from PyQt6.QtGui import QAction, QIcon, QPalette
 from PyQt6.QtWidgets import (
     QDialog,
@@ -25,6 +27,7 @@ from PyQt6.QtWidgets import (
 from abbonamenti.bot.config import BotConfig
 from abbonamenti.bot.runner import BotThread
 from abbonamenti.database.manager import DatabaseManager
+from abbonamenti.database.schema import Subscription
 from abbonamenti.gui.dialogs.add_edit_dialog import (
     AddEditSubscriptionDialog,
     DeleteSubscriptionDialog,
@@ -37,11 +40,29 @@ from abbonamenti.gui.dialogs.key_export_dialog import KeyExportDialog
 from abbonamenti.gui.dialogs.key_import_dialog import KeyImportDialog
 from abbonamenti.gui.dialogs.payment_report_dialog import PaymentReportDialog
 from abbonamenti.gui.dialogs.restore_dialog import RestoreDialog
-from abbonamenti.gui.dialogs.statistics_viewer import StatisticsViewer
 from abbonamenti.gui.models import SubscriptionsTableModel
 from abbonamenti.gui.styles import get_stylesheet
 from abbonamenti.utils.paths import get_database_path, get_keys_dir
 
+# Delay after the last keystroke before the search query runs
+_SEARCH_DEBOUNCE_MS = 180
+
+# Maximum number of search queries whose results are kept
+_SEARCH_CACHE_SIZE = 128
+
+# SQLite LIKE is case-insensitive for ASCII letters only
+_LIKE_CASEFOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _matches_search(subscription: Subscription, query: str) -> bool:
+    """Mirror the LIKE '%query%' test of DatabaseManager.search_subscriptions"""
+    needle = query.translate(_LIKE_CASEFOLD)
+    return (
+        needle in subscription.protocol_id.translate(_LIKE_CASEFOLD)
+        or needle in subscription.owner_name.translate(_LIKE_CASEFOLD)
+        or needle in subscription.license_plate.translate(_LIKE_CASEFOLD)
+    )
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -49,10 +70,16 @@ class MainWindow(QMainWindow):
         self.db_manager = DatabaseManager(get_database_path(), get_keys_dir())
         self.edit_mode_enabled = False
         self.has_modifications = False  # Track if data was modified
-        self.model = SubscriptionsTableModel(self.db_manager.get_all_subscriptions())
+        # Subscriptions by search query ("" = all), dropped whenever data changes
+        self._subscriptions_cache: OrderedDict[str, list[Subscription]] = OrderedDict()
+        # Search query whose results the table shows ("" = every subscription)
+        self._model_query = ""
+        self.model = SubscriptionsTableModel(self._get_subscriptions())
         self.bot_thread = None
         self.tray_icon = None
         self.bot_status_label = None
+        # Standard style icons, several of which are used more than once
+        self._icon_cache: dict[QStyle.StandardPixmap, QIcon] = {}
         self.init_ui()
         self.check_data_integrity()
         self.init_bot()
@@ -77,44 +104,50 @@ class MainWindow(QMainWindow):
         self.create_status_bar()
         self.create_system_tray()
 
+    def _std_icon(self, pixmap: QStyle.StandardPixmap) -> QIcon:
+        icon = self._icon_cache.get(pixmap)
+        if icon is None:
+            icon = self._icon_cache[pixmap] = self.style().standardIcon(pixmap)
+        return icon
+
     def create_menubar(self):
         menubar = self.menuBar()
 
         file_menu = menubar.addMenu("&File")
 
         export_action = QAction("Esporta CSV", self)
-        export_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
+        export_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_DialogSaveButton))
         export_action.triggered.connect(self.export_data)
         file_menu.addAction(export_action)
 
         self.import_action = QAction("Importa Excel", self)
-        self.import_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        self.import_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_DialogOpenButton))
         self.import_action.triggered.connect(self.import_from_excel)
         file_menu.addAction(self.import_action)
 
         file_menu.addSeparator()
 
         exit_action = QAction("Esci", self)
-        exit_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogCloseButton))
+        exit_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_DialogCloseButton))
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
 
         tools_menu = menubar.addMenu("&Strumenti")
 
         backup_action = QAction("Backup Database", self)
-        backup_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DriveHDIcon))
+        backup_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_DriveHDIcon))
         backup_action.triggered.connect(self.backup_database)
         tools_menu.addAction(backup_action)
 
         restore_action = QAction("Ripristina Backup", self)
-        restore_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_BrowserReload))
+        restore_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_BrowserReload))
         restore_action.triggered.connect(self.restore_database)
         tools_menu.addAction(restore_action)
 
         tools_menu.addSeparator()
 
         key_export_action = QAction("🔑 Esporta Chiave di Recupero", self)
-        key_export_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
+        key_export_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_DialogSaveButton))
         key_export_action.triggered.connect(self.export_recovery_keys)
         key_export_action.setToolTip(
             "CRITICO: Esporta le chiavi di cifratura per recuperare i backup"
@@ -122,7 +155,7 @@ class MainWindow(QMainWindow):
         tools_menu.addAction(key_export_action)
 
         key_import_action = QAction("Ripristina Chiavi di Recupero", self)
-        key_import_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        key_import_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_DialogOpenButton))
         key_import_action.triggered.connect(self.import_recovery_keys)
         key_import_action.setToolTip(
             "Usa il file chiavi .enc/.zip per poter aprire i backup cifrati"
@@ -133,7 +166,7 @@ class MainWindow(QMainWindow):
 
         bot_settings_action = QAction("🤖 Impostazioni Bot", self)
         bot_settings_action.setIcon(
-            self.style().standardIcon(QStyle.StandardPixmap.SP_ComputerIcon)
+            self._std_icon(QStyle.StandardPixmap.SP_ComputerIcon)
         )
         bot_settings_action.triggered.connect(self.show_bot_settings)
         tools_menu.addAction(bot_settings_action)
@@ -141,14 +174,14 @@ class MainWindow(QMainWindow):
         tools_menu.addSeparator()
 
         audit_action = QAction("Visualizza Log Audit", self)
-        audit_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation))
+        audit_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_MessageBoxInformation))
         audit_action.triggered.connect(self.show_audit_log)
         tools_menu.addAction(audit_action)
 
         help_menu = menubar.addMenu("&Aiuto")
 
         about_action = QAction("Informazioni", self)
-        about_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation))
+        about_action.setIcon(self._std_icon(QStyle.StandardPixmap.SP_MessageBoxInformation))
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
 
@@ -179,6 +212,13 @@ class MainWindow(QMainWindow):
         self.search_input.textChanged.connect(lambda text: self.on_search(text))
         toolbar.addWidget(self.search_input)
 
+        # Only the last keystroke in a burst triggers a query
+        self._pending_query = ""
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(_SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._run_search)
+
         toolbar.addSeparator()
 
         self.edit_mode_action = QPushButton("🔓 Modalità Modifica: OFF")
@@ -303,7 +343,7 @@ class MainWindow(QMainWindow):
         if icon_path.exists():
             icon = QIcon(str(icon_path))
         else:
-            icon = self.style().standardIcon(QStyle.StandardPixmap.SP_ComputerIcon)
+            icon = self._std_icon(QStyle.StandardPixmap.SP_ComputerIcon)
         
         self.tray_icon = QSystemTrayIcon(icon, self)
         
@@ -445,11 +485,63 @@ class MainWindow(QMainWindow):
 
     @pyqtSlot()
     def on_search(self, text: str):
-        if text:
-            subscriptions = self.db_manager.search_subscriptions(text)
+        self._pending_query = text
+        self._search_timer.start()
+
+    @pyqtSlot()
+    def _run_search(self):
+        self._model_query = self._pending_query
+        self.model.update_data(self._get_subscriptions(self._model_query))
+
+    def _get_subscriptions(self, query: str = "") -> list[Subscription]:
+        """Return subscriptions matching query ("" = all), cached until data changes"""
+        subscriptions = self._subscriptions_cache.get(query)
+        if subscriptions is None:
+            if not query:
+                subscriptions = self.db_manager.get_all_subscriptions()
+            else:
+                subscriptions = self._narrow_cached_search(query)
+                if subscriptions is None:
+                    subscriptions = self.db_manager.search_subscriptions(query)
+            self._subscriptions_cache[query] = subscriptions
+            if len(self._subscriptions_cache) > _SEARCH_CACHE_SIZE:
+                self._subscriptions_cache.popitem(last=False)
         else:
-            subscriptions = self.db_manager.get_all_subscriptions()
-        self.model.update_data(subscriptions)
+            self._subscriptions_cache.move_to_end(query)
+        # The model sorts its list in place, so never hand out the cached one
+        return list(subscriptions)
+
+    def _narrow_cached_search(self, query: str) -> list[Subscription] | None:
+        """
+        Filter the cached result of the longest cached prefix of query.
+
+        Every match for "Sca" is also a match for "Sc", so extending a query
+        only needs to filter rows already fetched (and decrypted). Mirrors the
+        LIKE '%query%' test of DatabaseManager.search_subscriptions; queries
+        containing LIKE wildcards always go to the database.
+        """
+        if "%" in query or "_" in query:
+            return None
+        for end in range(len(query) - 1, -1, -1):
+            base = self._subscriptions_cache.get(query[:end])
+            if base is not None:
+                break
+        else:
+            return None
+        return [sub for sub in base if _matches_search(sub, query)]
+
+    def _matches_model_query(self, subscription: Subscription) -> bool:
+        """Whether subscription belongs in the table under the active search"""
+        query = self._model_query
+        if not query:
+            return True
+        if "%" in query or "_" in query:
+            return False
+        return _matches_search(subscription, query)
+
+    def _invalidate_subscriptions_cache(self):
+        """Forget cached subscriptions after any change to the database"""
+        self._subscriptions_cache.clear()
 
     def check_data_integrity(self):
         is_valid, issues = self.db_manager.verify_data_integrity()
@@ -473,8 +565,14 @@ class MainWindow(QMainWindow):
                 f"Rilevati problemi di integrità:\n\n{tooltip_text}",
             )
 
-    def update_status_bar(self):
-        subscriptions = self.db_manager.get_all_subscriptions()
+    def update_status_bar(self, subscriptions: list[Subscription] | None = None):
+        if subscriptions is None:
+            # An unfiltered table already holds every subscription, kept
+            # current row by row after add/edit/delete
+            if self._model_query:
+                subscriptions = self._get_subscriptions()
+            else:
+                subscriptions = self.model.subscriptions
         today = datetime.now().date()
 
         active = 0
@@ -497,9 +595,11 @@ class MainWindow(QMainWindow):
 
     def load_data(self):
         """Reload subscriptions into the table and refresh status/integrity."""
-        subscriptions = self.db_manager.get_all_subscriptions()
+        self._invalidate_subscriptions_cache()
+        self._model_query = ""
+        subscriptions = self._get_subscriptions()
         self.model.update_data(subscriptions)
-        self.update_status_bar()
+        self.update_status_bar(subscriptions)
         self.check_data_integrity()
 
     @pyqtSlot()
@@ -526,7 +626,12 @@ class MainWindow(QMainWindow):
                     f"Abbonamento aggiunto con successo!\n\n"
                     f"ID Protocollo: {protocol_id}",
                 )
-                self.model.update_data(self.db_manager.get_all_subscriptions())
+                self._invalidate_subscriptions_cache()
+                subscription = self.db_manager.get_subscription(protocol_id)
+                if self._matches_model_query(subscription):
+                    self.model.insert_row(subscription)
+                else:
+                    self._run_search()
                 self.update_status_bar()
                 self.has_modifications = True
             except Exception as e:
@@ -582,7 +687,12 @@ class MainWindow(QMainWindow):
                         "Successo",
                         "Abbonamento modificato con successo!",
                     )
-                    self.model.update_data(self.db_manager.get_all_subscriptions())
+                    self._invalidate_subscriptions_cache()
+                    subscription = self.db_manager.get_subscription(protocol_id)
+                    if self._matches_model_query(subscription):
+                        self.model.update_row(subscription)
+                    else:
+                        self._run_search()
                     self.update_status_bar()
                     self.has_modifications = True
                 else:
@@ -632,7 +742,8 @@ class MainWindow(QMainWindow):
                         "Successo",
                         "Abbonamento eliminato con successo!",
                     )
-                    self.model.update_data(self.db_manager.get_all_subscriptions())
+                    self._invalidate_subscriptions_cache()
+                    self.model.remove_row(protocol_id)
                     self.update_status_bar()
                     self.has_modifications = True
                 else:
@@ -652,6 +763,9 @@ class MainWindow(QMainWindow):
     @pyqtSlot()
     def show_statistics(self):
         """Show payment statistics dialog"""
+        # Imported here so matplotlib is only loaded if statistics are opened
+        from abbonamenti.gui.dialogs.statistics_viewer import StatisticsViewer
+
         viewer = StatisticsViewer(self.db_manager, self)
         viewer.exec()
 
@@ -725,7 +839,7 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            subscriptions = self.db_manager.get_all_subscriptions()
+            subscriptions = self._get_subscriptions()
             with open(file_path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
                 writer.writerow(
@@ -915,14 +1029,14 @@ class MainWindow(QMainWindow):
                 # Silent backup with auto-generated passphrase from HMAC key
                 from datetime import datetime
                 from abbonamenti.utils.paths import get_backups_dir
-                import hashlib
+                from abbonamenti.security.crypto import derive_auto_backup_passphrase
                 
                 # Derive passphrase from HMAC key (always available)
                 hmac_key_path = get_keys_dir() / "hmac_key.bin"
                 with open(hmac_key_path, "rb") as f:
                     hmac_key = f.read()
                 # Create a deterministic 32-char passphrase from HMAC key
-                passphrase = hashlib.sha256(hmac_key + b"auto_backup_salt").hexdigest()[:32]
+                passphrase = derive_auto_backup_passphrase(hmac_key)
                 
                 backup_filename = f"auto_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.enc"
                 backup_path = get_backups_dir() / backup_filename
@@ -115,6 +115,40 @@ class SubscriptionsTableModel(QAbstractTableModel):
         self.subscriptions = subscriptions
         self.endResetModel()
 
+    def _row_of(self, protocol_id: str) -> int:
+        for row, subscription in enumerate(self.subscriptions):
+            if subscription.protocol_id == protocol_id:
+                return row
+        return -1
+
+    def insert_row(self, subscription: Subscription):
+        """Append one subscription without resetting the model."""
+        row = len(self.subscriptions)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.subscriptions.append(subscription)
+        self.endInsertRows()
+
+    def update_row(self, subscription: Subscription) -> bool:
+        """Replace the subscription with the same protocol ID, if shown."""
+        row = self._row_of(subscription.protocol_id)
+        if row < 0:
+            return False
+        self.subscriptions[row] = subscription
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, self.columnCount() - 1)
+        )
+        return True
+
+    def remove_row(self, protocol_id: str) -> bool:
+        """Remove the subscription with this protocol ID, if shown."""
+        row = self._row_of(protocol_id)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.subscriptions[row]
+        self.endRemoveRows()
+        return True
+
     def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
         """Sort table by column while preserving current data."""
         reverse = order == Qt.SortOrder.DescendingOrder
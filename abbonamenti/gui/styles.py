@@ -5,6 +5,7 @@ Adds Windows 11-aware light/dark selection using the current Qt palette.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from string import Template
 from typing import Dict
 
@@ -480,8 +481,12 @@ def _detect_system_theme() -> str:
 
 
 def _resolve_colors() -> Dict[str, str]:
+    return _colors_for_theme(_detect_system_theme())
+
+
+def _colors_for_theme(theme: str) -> Dict[str, str]:
     colors = dict(BASE_COLORS)
-    if _detect_system_theme() == "dark":
+    if theme == "dark":
         colors.update(
             {
                 "background": "#1f1f1f",
@@ -499,8 +504,25 @@ def _resolve_colors() -> Dict[str, str]:
 def get_stylesheet() -> str:
     """Return the stylesheet adapted to the current system (Windows 11) theme."""
 
-    colors = _resolve_colors()
-    return STYLE_TEMPLATE.substitute(colors)
+    return _stylesheet_for_theme(_detect_system_theme())
+
+
+@lru_cache(maxsize=2)
+def _stylesheet_for_theme(theme: str) -> str:
+    """Substitute the template once per theme; callers get the cached string."""
+
+    return STYLE_TEMPLATE.substitute(_colors_for_theme(theme))
+
+
+def themed_stylesheet(template: Template) -> str:
+    """Substitute a $color stylesheet template for the current theme (cached)."""
+
+    return _themed_stylesheet(template, _detect_system_theme())
+
+
+@lru_cache(maxsize=64)
+def _themed_stylesheet(template: Template, theme: str) -> str:
+    return template.substitute(_colors_for_theme(theme))
 
 
 def get_color(name: str) -> str:
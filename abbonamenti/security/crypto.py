@@ -1,8 +1,10 @@
+import hashlib
 import json
 import os
 import base64
 from pathlib import Path
 
+from argon2.low_level import Type, hash_secret_raw
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes, hmac, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
@@ -13,6 +15,16 @@ from cryptography.hazmat.primitives.serialization import (
     PublicFormat,
 )
 
+# Layout of passphrase-encrypted files: MAGIC | version byte | salt | payload
+MAGIC = b"87029"
+VERSION_DB_BACKUP = 0x01
+VERSION_KEY_EXPORT = 0x02  # PBKDF2 (legacy key exports)
+VERSION_KEY_EXPORT_ARGON2 = 0x03
+SALT_LEN = 32
+HEADER_LEN = len(MAGIC) + 1 + SALT_LEN
+# Shortest passphrase accepted for backups and key exports
+MIN_PASSPHRASE_LEN = 16
+
 
 class CryptoManager:
     def __init__(self, keys_dir: Path):
@@ -69,6 +81,11 @@ class CryptoManager:
             return False
 
 
+# PBKDF2 iteration count is not stored in the file header: changing it would make
+# existing backups and legacy key exports undecryptable.
+PBKDF2_ITERATIONS = 1_000_000
+
+
 def derive_key_from_passphrase(passphrase: str, salt: bytes | None = None) -> tuple[bytes, bytes]:
     """
     Derive a 32-byte encryption key from a passphrase using PBKDF2.
@@ -83,23 +100,85 @@ def derive_key_from_passphrase(passphrase: str, salt: bytes | None = None) -> tu
     Raises:
         ValueError: If passphrase is less than 16 characters
     """
-    if len(passphrase) < 16:
-        raise ValueError("Passphrase deve essere di almeno 16 caratteri")
+    if len(passphrase) < MIN_PASSPHRASE_LEN:
+        raise ValueError(
+            f"Passphrase deve essere di almeno {MIN_PASSPHRASE_LEN} caratteri"
+        )
     
     if salt is None:
-        salt = os.urandom(32)
+        salt = os.urandom(SALT_LEN)
     
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
         salt=salt,
-        iterations=1000000,
+        iterations=PBKDF2_ITERATIONS,
     )
     
     key = kdf.derive(passphrase.encode('utf-8'))
     return key, salt
 
 
+# Argon2id parameters for the key-export KDF (memory_cost is in KiB)
+ARGON2_TIME_COST = 3
+ARGON2_MEMORY_COST = 262144
+ARGON2_PARALLELISM = 4
+
+
+def derive_key_from_passphrase_argon2(
+    passphrase: str, salt: bytes | None = None
+) -> tuple[bytes, bytes]:
+    """
+    Derive a 32-byte encryption key from a passphrase using Argon2id.
+
+    Args:
+        passphrase: User passphrase (minimum 16 characters)
+        salt: Optional salt (if None, generates new random salt)
+
+    Returns:
+        Tuple of (derived_key, salt)
+
+    Raises:
+        ValueError: If passphrase is less than 16 characters
+    """
+    if len(passphrase) < MIN_PASSPHRASE_LEN:
+        raise ValueError(
+            f"Passphrase deve essere di almeno {MIN_PASSPHRASE_LEN} caratteri"
+        )
+
+    if salt is None:
+        salt = os.urandom(SALT_LEN)
+
+    key = hash_secret_raw(
+        secret=passphrase.encode('utf-8'),
+        salt=salt,
+        time_cost=ARGON2_TIME_COST,
+        memory_cost=ARGON2_MEMORY_COST,
+        parallelism=ARGON2_PARALLELISM,
+        hash_len=32,
+        type=Type.ID,
+    )
+    return key, salt
+
+
+# Deterministic passphrase for automatic backups, derived from the HMAC key.
+# Changing the derivation would make existing auto-backups unrestorable.
+AUTO_BACKUP_SALT = b"auto_backup_salt"
+
+
+def derive_auto_backup_passphrase(hmac_key: bytes | bytearray) -> str:
+    """
+    Derive the 32-character passphrase used for automatic backups.
+
+    The HMAC key is 256 bits of random data, so a single hash is enough here;
+    the backup itself is still encrypted with a PBKDF2-stretched key.
+    """
+    digest = hashlib.sha256(hmac_key)
+    digest.update(AUTO_BACKUP_SALT)
+    # First 16 bytes as hex == hexdigest()[:32], without hex-encoding all 32
+    return digest.digest()[:16].hex()
+
+
 def encrypt_with_key(data: bytes, key: bytes) -> bytes:
     """Encrypt data with a derived key using Fernet."""
     fernet_key = base64.urlsafe_b64encode(key)